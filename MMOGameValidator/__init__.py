@@ -1,14 +1,21 @@
 from __future__ import unicode_literals
 
 import io
-import json
 import os
-import re
+import threading
+import types
 from collections import OrderedDict
+from time import monotonic as _clock
+from time import perf_counter as _timer
 
-VALID_GAME_CODE = re.compile(r"^\w{2,3}$")
+# json, re and the modules only some functions need are imported on first
+# use, importing the package reads no file and compiles no regex
+_VALID_GAME_CODE_PATTERN = r"^\w{2,3}$"
 VALIDATION_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 VALIDATION_DATA_PATH = os.path.join(VALIDATION_DATA_DIR, "%s.json")
+# a directory of synced game files taking precedence over the packaged ones
+VALIDATION_CACHE_DIR = None
+BUNDLE_FILENAME = "games.bundle"
 
 FIELD_MAPPING = { 
     "A": "faction", #faction
@@ -22,22 +29,356 @@ FIELD_MAPPING = {
 KNOWN_FIELDS = set(FIELD_MAPPING.values()) | {"game_code"}
 
 
-def load_validation_data(game_code="all"):
-    if not VALID_GAME_CODE.match(game_code):
+RULES_CACHE_SIZE = 1024
+LATIN_CACHE_SIZE = 4096
+NAME_CACHE_SIZE = 4096
+RESULT_CACHE_SIZE = 65536
+RESULT_CACHE_TTL = 300.0
+
+
+class _LRUCache(object):
+    """A least recently used cache safe to share between threads.
+
+    Lookups take no lock: a hit refreshes the entry's recency only when no
+    other thread holds the lock, so under contention eviction is close to,
+    not exactly, least recently used. Hit and miss counts are approximate.
+    """
+
+    __slots__ = ["maxsize", "hits", "misses", "_data", "_lock"]
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def _touch(self, key):
+        if self._lock.acquire(False):
+            try:
+                if key in self._data:
+                    self._data.move_to_end(key)
+            finally:
+                self._lock.release()
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class _ResultCache(_LRUCache):
+    """Results of ``normalize_character`` keyed on the character's fields.
+
+    An entry remembers the compiled game it was validated against and is
+    dropped once that game is recompiled or ``ttl`` seconds have passed.
+    """
+
+    __slots__ = ["ttl"]
+
+    def __init__(self, maxsize, ttl):
+        super(_ResultCache, self).__init__(maxsize)
+        self.ttl = ttl
+
+    def lookup(self, key):
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, game_code, game, cleaned, errors = entry
+            if _COMPILED_GAMES.get(game_code) is game and (
+                expires is None or expires > _clock()
+            ):
+                self.hits += 1
+                self._touch(key)
+                return cleaned, errors
+            with self._lock:
+                # unless another thread already replaced it
+                if self._data.get(key) is entry:
+                    del self._data[key]
+        self.misses += 1
+        return None
+
+    def store(self, key, game_code, cleaned, errors):
+        expires = None
+        if self.ttl is not None:
+            expires = _clock() + self.ttl
+        game = _COMPILED_GAMES.get(game_code)
+        self.set(key, (expires, game_code, game, cleaned, errors))
+
+
+_DATABASE_CACHE = {}
+_BUNDLE_CACHE = {}
+_COMPILED_GAMES = {}
+_RULES_CACHE = _LRUCache(RULES_CACHE_SIZE)
+# single-flight loading and compiling: a thread parsing a file or compiling a
+# game holds the lock of its stripe, threads wanting the same one wait for it
+# and then find it cached instead of doing the work again
+_LOCK_STRIPES = 64
+_LOAD_LOCKS = tuple(threading.Lock() for _i in range(_LOCK_STRIPES))
+_COMPILE_LOCKS = tuple(threading.Lock() for _i in range(_LOCK_STRIPES))
+# the installed ValidationStats (or compatible hook), None when disabled
+_stats = None
+_result_cache = None
+
+
+def _get_valid_game_code():
+    valid_game_code = globals().get("VALID_GAME_CODE")
+    if valid_game_code is None:
+        import re
+
+        valid_game_code = re.compile(_VALID_GAME_CODE_PATTERN)
+        globals()["VALID_GAME_CODE"] = valid_game_code
+    return valid_game_code
+
+
+def __getattr__(name):
+    # VALID_GAME_CODE is compiled the first time it is needed
+    if name == "VALID_GAME_CODE":
+        return _get_valid_game_code()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def _get_cached_data_path(game_code):
+    if VALIDATION_CACHE_DIR:
+        path = os.path.join(VALIDATION_CACHE_DIR, "%s.json" % game_code.lower())
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _get_validation_data_path(game_code):
+    if not _get_valid_game_code().match(game_code):
         raise ValueError("%r is not a valid game code" % (game_code,))
     game_code = game_code.lower()
+    path = _get_cached_data_path(game_code)
+    if path is not None:
+        return path
+    return _get_package_data_path(game_code)
+
+
+def _get_package_data_path(game_code):
     try:
         # VALIDATION_DATA_PATH may have '%' symbols
         # for backwards compatability if VALIDATION_DATA_PATH is imported
         # by consumers of this package.
-        path = VALIDATION_DATA_PATH % (game_code,)
+        return VALIDATION_DATA_PATH % (game_code,)
     except TypeError:
-        path = os.path.join(VALIDATION_DATA_DIR, "%s.json" % game_code)
+        return os.path.join(VALIDATION_DATA_DIR, "%s.json" % game_code)
 
-    if not os.path.exists(path):
-        raise ValueError("%r is not a valid game code" % (game_code,))
-    with io.open(path, encoding="utf-8") as data:
-        return json.load(data)
+
+def _load_bundle(path):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _BUNDLE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _LOAD_LOCKS[hash(path) % _LOCK_STRIPES]:
+        cached = _BUNDLE_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        from .bundle import GameBundle
+
+        bundle = GameBundle(path)
+        _BUNDLE_CACHE[path] = (mtime, bundle)
+    return bundle
+
+
+def _load_database(game_code):
+    # Returns the parsed database shared by every caller in this process,
+    # it must never be mutated.
+    path = _get_validation_data_path(game_code)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    # a bundle built from the data directory takes precedence over its
+    # files, unless the game's file was modified after the bundle was built
+    bundle = _load_bundle(os.path.join(os.path.dirname(path), BUNDLE_FILENAME))
+    stats = _stats
+    if bundle is not None and (mtime is None or mtime <= bundle.mtime):
+        timed = stats is not None and not bundle.is_loaded(game_code.lower())
+        if timed:
+            start = _timer()
+        database = bundle.get_database(game_code.lower())
+        if database is not None:
+            if timed:
+                stats.count(game_code.upper(), "files_loaded")
+                stats.timing(game_code.upper(), "load", _timer() - start)
+            return database
+    if mtime is None:
+        raise ValueError("%r is not a valid game code" % (game_code.lower(),))
+    cached = _DATABASE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _LOAD_LOCKS[hash(path) % _LOCK_STRIPES]:
+        cached = _DATABASE_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if stats is not None:
+            start = _timer()
+        import json
+
+        try:
+            with io.open(path, encoding="utf-8") as data:
+                database = json.load(data)
+            if not isinstance(database, dict):
+                raise ValueError("%r is not a JSON object" % (path,))
+        except ValueError as e:
+            if cached is None:
+                raise
+            # a file being rewritten or broken by an edit: keep serving what
+            # was parsed before, until its modification time changes again
+            import logging
+
+            logging.getLogger(__name__).warning(
+                "keeping the previous data of %s: %s", path, e
+            )
+            _DATABASE_CACHE[path] = (mtime, cached[1], cached[2])
+            return cached[1]
+        _DATABASE_CACHE[path] = (mtime, database, game_code.lower())
+    if stats is not None:
+        stats.count(game_code.upper(), "files_loaded")
+        stats.timing(game_code.upper(), "load", _timer() - start)
+    return database
+
+
+def load_validation_data(game_code="all"):
+    import copy
+
+    return copy.deepcopy(dict(_load_database(game_code)))
+
+
+def clear_cache():
+    """Drop every parsed game database and compiled rule held in memory.
+
+    Databases are otherwise reloaded only when the modification time of
+    their file changes.
+    """
+    _DATABASE_CACHE.clear()
+    _BUNDLE_CACHE.clear()
+    _COMPILED_GAMES.clear()
+    _RULES_CACHE.clear()
+    _FORMAT_TEMPLATES.clear()
+    if _result_cache is not None:
+        _result_cache.clear()
+
+
+def enable_stats(stats=None):
+    """Start recording hot path timings and counters.
+
+    Installs ``stats`` or, by default, a fresh ``ValidationStats`` and
+    returns it. Nothing is measured while stats are disabled.
+    """
+    global _stats
+    if stats is None:
+        from .stats import ValidationStats
+
+        stats = ValidationStats()
+    _stats = stats
+    return stats
+
+
+def disable_stats():
+    global _stats
+    _stats = None
+
+
+def get_stats():
+    return _stats
+
+
+def enable_result_cache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+    """Remember the outcome of ``normalize_character`` for equal characters.
+
+    Characters are equal when all of their known fields are; both the
+    normalized character and the errors of an invalid one are cached. At
+    most ``maxsize`` results are kept, each for ``ttl`` seconds (forever
+    with ``None``), and the results of a game are dropped when its data is
+    reloaded. Replaces any result cache already enabled.
+    """
+    global _result_cache
+    _result_cache = _ResultCache(maxsize, ttl)
+
+
+def disable_result_cache():
+    global _result_cache
+    _result_cache = None
+
+
+def available_game_codes():
+    """Return the lowercase code of every game in the data directories."""
+    import glob
+
+    data_dir = os.path.dirname(_get_package_data_path("zz"))
+    data_dirs = {data_dir}
+    if VALIDATION_CACHE_DIR:
+        data_dirs.add(VALIDATION_CACHE_DIR)
+    game_codes = {
+        os.path.splitext(os.path.basename(path))[0].lower()
+        for directory in data_dirs
+        for path in glob.glob(os.path.join(directory, "*.json"))
+    }
+    bundle = _load_bundle(os.path.join(data_dir, BUNDLE_FILENAME))
+    if bundle is not None:
+        game_codes.update(bundle.game_codes())
+    game_codes.discard("zz")
+    return sorted(game_codes)
+
+
+def get_cache_info():
+    info = _RULES_CACHE.info()
+    if _result_cache is not None:
+        info["results"] = _result_cache.info()
+    info["games"] = len(_COMPILED_GAMES)
+    info["databases"] = len(_DATABASE_CACHE) + sum(
+        len(bundle._databases) for _mtime, bundle in _BUNDLE_CACHE.values()
+    )
+    return info
+
+
+class _SetRepr(object):
+    # a frozenset spelled as a set, in its own order: copying it into a set
+    # may reorder it
+    __slots__ = ["values"]
+
+    def __init__(self, values):
+        self.values = values
+
+    def __repr__(self):
+        if not self.values:
+            return "set()"
+        return "{%s}" % ", ".join(repr(value) for value in self.values)
 
 
 class ValidationRules(object):
@@ -58,6 +399,12 @@ class ValidationRules(object):
         "character_name_type",
         "character_name_matchers",
         "character_name_prefix",
+        "faction_index",
+        "region_index",
+        "server_index",
+        "character_name_check",
+        "_choice_plan",
+        "_name_plan",
     ]
 
     def __init__(
@@ -78,25 +425,71 @@ class ValidationRules(object):
         character_name_type,
         character_name_matchers,
         character_name_prefix,
+        faction_index=None,
+        region_index=None,
+        server_index=None,
+        character_name_check=None,
     ):
         self.game_code = game_code
         self.game_name = game_name
         self.game_short_name = game_short_name
         self.character_format = character_format
-        self.allowed_fields = allowed_fields
-        self.required_fields = required_fields
-        self.upper_fields = upper_fields
+        # rules are shared between threads and cached, what they hold is
+        # immutable; compiled rules are passed tuples and frozensets already
+        self.allowed_fields = frozenset(allowed_fields)
+        self.required_fields = frozenset(required_fields)
+        self.upper_fields = frozenset(upper_fields)
         self.faction_type = faction_type
-        self.faction_choices = faction_choices
+        self.faction_choices = tuple(faction_choices)
         self.region_type = region_type
-        self.region_choices = region_choices
+        self.region_choices = tuple(region_choices)
         self.server_type = server_type
-        self.server_choices = server_choices
+        self.server_choices = tuple(server_choices)
         self.character_name_type = character_name_type
-        self.character_name_matchers = character_name_matchers
+        self.character_name_matchers = tuple(character_name_matchers)
         self.character_name_prefix = character_name_prefix
+        if faction_index is None:
+            faction_index = _make_choice_index(self.faction_choices)
+        if region_index is None:
+            region_index = _make_choice_index(self.region_choices)
+        if server_index is None:
+            server_index = _make_choice_index(self.server_choices)
+        self.faction_index = faction_index
+        self.region_index = region_index
+        self.server_index = server_index
+        if character_name_check is None:
+            character_name_check = _NameCheck(self.character_name_matchers)
+        self.character_name_check = character_name_check
+        self._choice_plan = self._plan_fields(
+            ("region", region_index),
+            ("faction", faction_index),
+            ("server", server_index),
+        )
+        self._name_plan = self._plan_fields(
+            ("character_name", None), ("sorting_code", None)
+        )
+
+    def _plan_fields(self, *fields):
+        # the rules lookups of _apply_field_plan, done once per rules
+        plan = []
+        for name, choice_index in fields:
+            check = None
+            if name == "character_name" and self.character_name_check.matchers:
+                check = self.character_name_check
+            plan.append(
+                (
+                    name,
+                    name in self.upper_fields,
+                    name in self.allowed_fields,
+                    name in self.required_fields,
+                    choice_index,
+                    check,
+                )
+            )
+        return tuple(plan)
 
     def __repr__(self):
+        # spelled as the lists and sets the rules used to hold
         return (
             "ValidationRules("
             "game_code=%r, "
@@ -120,17 +513,17 @@ class ValidationRules(object):
                 self.game_name,
                 self.game_short_name,
                 self.character_format,
-                self.allowed_fields,
-                self.required_fields,
-                self.upper_fields,
+                _SetRepr(self.allowed_fields),
+                _SetRepr(self.required_fields),
+                _SetRepr(self.upper_fields),
                 self.faction_type,
-                self.faction_choices,
+                list(self.faction_choices),
                 self.region_type,
-                self.region_choices,
+                list(self.region_choices),
                 self.server_type,
-                self.server_choices,
+                list(self.server_choices),
                 self.character_name_type,
-                self.character_name_matchers,
+                list(self.character_name_matchers),
                 self.character_name_prefix,
             )
         )
@@ -206,9 +599,9 @@ def _compact_choices(choices):
         if not key in value_map:
             value_map[key] = set()
         value_map[key].add(value)
-    return [
+    return tuple(
         (key, value) for key, values in value_map.items() for value in sorted(values)
-    ]
+    )
 
 
 def _match_choices(value, choices):
@@ -221,318 +614,1018 @@ def _match_choices(value, choices):
             return name
 
 
+def _make_choice_index(choices):
+    # maps every lowercased name and label to its name, the first entry wins
+    # so lookups agree with the order in which _match_choices scans
+    lowered = {}
+    for name, label in choices:
+        lowered.setdefault(name.lower(), name)
+        lowered.setdefault(label.lower(), name)
+    # every key, and every name and label as spelled in the data, maps to
+    # what _match_index would match it to, so a value spelled exactly like a
+    # key is found without allocating its stripped, lowercased copy
+    index = {}
+    for keys in (lowered, [text for choice in choices for text in choice]):
+        for key in keys:
+            name = lowered.get(key.strip().lower() if key else key)
+            if name is not None:
+                index[key] = name
+    return index
+
+
+def _match_index(value, index):
+    if value:
+        name = index.get(value)
+        if name is not None:
+            return name
+        value = value.strip().lower()
+    return index.get(value)
+
+
 def _load_game_data(game_code):
-    database = load_validation_data("zz")
-    game_data = database["ZZ"]
+    database = _load_database("zz")
+    game_data = dict(database["ZZ"])
     if game_code:
         game_code = game_code.upper()
         if game_code.lower() == "zz":
             raise ValueError("%r is not a valid game code" % (game_code,))
-        database = load_validation_data(game_code.lower())
+        database = _load_database(game_code.lower())
         game_data.update(database[game_code])
     return game_data, database
 
 
-def get_validation_rules(character):
-    game_code = character.get("game_code", "").upper()
-    game_data, database = _load_game_data(game_code)
-    game_name = game_data.get("name", "")
-    game_short_name = game_data.get("short_name", "")
-    character_format = game_data["fmt"]
-    format_fields = re.finditer(r"%([ACNSXZ])", character_format)
-    allowed_fields = {FIELD_MAPPING[m.group(1)] for m in format_fields}
-    required_fields = {FIELD_MAPPING[f] for f in game_data["require"]}
-    upper_fields = {FIELD_MAPPING[f] for f in game_data["upper"]}
-    languages = [None]
-    if "languages" in game_data:
-        languages = game_data["languages"].split("~")
-
-    character_name_matchers = []
-    if "character_name" in allowed_fields:
-        if "regex" in game_data:
-            character_name_matchers.append(re.compile("^" + game_data["regex"] + "$"))
-            
-    faction_type = game_data.get("game_faction_type", "")
-    faction_choices = []
-    region_choices = []
-    server_choices = []
-    region_type = game_data["region_name_type"]
-    server_type = game_data["locality_name_type"]
-    character_name_type = game_data["regex_name_type"]
-    character_name_prefix = game_data.get("charprefix", "")
-    # second level of data is for administrative areas
-    region = None
-    faction = None
-    server = None
-    server_area = None
-    
-    if game_code in database:
-        if "faction_keys" in game_data:
-            for language in languages:
-                is_default_language = (
-                    language is None or language == game_data["lang"]
+# numbered groups are renumbered once patterns are combined
+_BACKREFERENCE = r"\\[1-9]|\(\?P="
+
+
+class _NameCheck(object):
+    """Match a character name against the regexes of every level at once.
+
+    The regexes are combined into lookaheads of a single pattern and the
+    verdict for every name is remembered, so a name seen before is checked
+    with a dict lookup. ``levels`` names the level each matcher comes from.
+    """
+
+    __slots__ = ["matchers", "levels", "_pattern", "_verdicts"]
+
+    def __init__(self, matchers, levels=None):
+        self.matchers = tuple(matchers)
+        if levels is None:
+            levels = [matcher.pattern for matcher in self.matchers]
+        self.levels = tuple(levels)
+        self._pattern = None
+        self._verdicts = {}
+        if len(self.matchers) < 2:
+            return
+        import re
+
+        if not any(
+            matcher.groups and re.search(_BACKREFERENCE, matcher.pattern)
+            for matcher in self.matchers
+        ):
+            try:
+                self._pattern = re.compile(
+                    "".join("(?=%s)" % matcher.pattern for matcher in self.matchers)
+                )
+            except re.error:
+                pass
+
+    def rejected_level(self, name):
+        """Return the level whose regex rejects ``name`` or ``None``."""
+        if not self.matchers:
+            return None
+        verdicts = self._verdicts
+        try:
+            return verdicts[name]
+        except KeyError:
+            pass
+        verdict = None
+        if self._pattern is None or not self._pattern.match(name):
+            # only a rejected name is matched level by level
+            for level, matcher in zip(self.levels, self.matchers):
+                if not matcher.match(name):
+                    verdict = level
+                    break
+        if len(verdicts) >= NAME_CACHE_SIZE:
+            verdicts.clear()
+        verdicts[name] = verdict
+        return verdict
+
+
+class _CompiledLevel(object):
+    __slots__ = [
+        "data",
+        "choices",
+        "index",
+        "has_sub_keys",
+        "matcher",
+        "_compacted",
+    ]
+
+    def __init__(self, data):
+        self.data = data
+        self.choices = _make_choices(data)
+        self.index = _make_choice_index(self.choices)
+        self.has_sub_keys = "sub_keys" in data
+        self.matcher = None
+        if "regex" in data:
+            import re
+
+            self.matcher = re.compile("^" + data["regex"])
+        self._compacted = None
+
+    def compacted(self):
+        compacted = self._compacted
+        if compacted is None:
+            # published at once, a thread sees both the choices and the index
+            choices = _compact_choices(self.choices)
+            compacted = self._compacted = (choices, _make_choice_index(choices))
+        return compacted
+
+
+class _CompiledGame(object):
+    """Everything in the rules that depends on the game code alone."""
+
+    __slots__ = [
+        "game_code",
+        "game_data",
+        "database",
+        "game_name",
+        "game_short_name",
+        "character_format",
+        "allowed_fields",
+        "required_fields",
+        "upper_fields",
+        "faction_type",
+        "faction_choices",
+        "faction_index",
+        "region_type",
+        "region_choices",
+        "region_index",
+        "server_type",
+        "character_name_type",
+        "character_name_matchers",
+        "character_name_prefix",
+        "languages",
+        "_levels",
+        "_latin_names",
+        "_name_checks",
+        "_choices",
+    ]
+
+    def __init__(self, game_code, game_data, database):
+        self.game_code = game_code
+        self.game_data = game_data
+        self.database = database
+        self._levels = {}
+        self._latin_names = {}
+        self._name_checks = {}
+        self._choices = {}
+        self.game_name = game_data.get("name", "")
+        self.game_short_name = game_data.get("short_name", "")
+        self.character_format = game_data["fmt"]
+        import re
+
+        format_fields = re.finditer(r"%([ACNSXZ])", self.character_format)
+        self.allowed_fields = frozenset(
+            FIELD_MAPPING[m.group(1)] for m in format_fields
+        )
+        self.required_fields = frozenset(
+            FIELD_MAPPING[f] for f in game_data["require"]
+        )
+        self.upper_fields = frozenset(FIELD_MAPPING[f] for f in game_data["upper"])
+        languages = [None]
+        if "languages" in game_data:
+            languages = game_data["languages"].split("~")
+
+        self.character_name_matchers = ()
+        if "character_name" in self.allowed_fields:
+            if "regex" in game_data:
+                self.character_name_matchers = (
+                    re.compile("^" + game_data["regex"] + "$"),
                 )
-                # matched_faction = None
-                if is_default_language:
-                    localized_game_data = database[game_code]
-                else:
+                if _stats is not None:
+                    _stats.count(game_code, "regexes_compiled")
+
+        self.faction_type = game_data.get("game_faction_type", "")
+        self.region_type = game_data["region_name_type"]
+        self.server_type = game_data["locality_name_type"]
+        self.character_name_type = game_data["regex_name_type"]
+        self.character_name_prefix = game_data.get("charprefix", "")
+        faction_choices = []
+        region_choices = []
+        # (language, is_default_language, level) for every language whose
+        # region choices have to be matched against
+        self.languages = []
+
+        if game_code in database:
+            if "faction_keys" in game_data:
+                for language in languages:
                     localized_game_data = database[
-                        "%s--%s" % (game_code, language)
+                        self._localized_key(game_code, language)
                     ]
-                localized_faction_choices = _make_none_choices(localized_game_data)
-                faction_choices += localized_faction_choices
-                existing_choice = faction is not None
-                matched_faction = faction = _match_choices(
-                    character.get("faction"), localized_faction_choices
+                    faction_choices += _make_none_choices(localized_game_data)
+            if "sub_keys" in game_data:
+                for language in languages:
+                    is_default_language = self._is_default_language(language)
+                    level = self.level(game_code, language)
+                    region_choices += level.choices
+                    self.languages.append((language, is_default_language, level))
+            region_choices = _compact_choices(region_choices)
+            faction_choices = _compact_choices(faction_choices)
+        self.region_choices = tuple(region_choices)
+        self.faction_choices = tuple(faction_choices)
+        self.region_index = _make_choice_index(self.region_choices)
+        self.faction_index = _make_choice_index(self.faction_choices)
+
+    def _is_default_language(self, language):
+        return language is None or language == self.game_data["lang"]
+
+    def _localized_key(self, key, language):
+        if self._is_default_language(language):
+            return key
+        return "%s--%s" % (key, language)
+
+    def choices(self, level, parent, language):
+        """Return the cached choices served by ``get_choices``.
+
+        They are cached under the region ``parent`` matched and a language
+        of the game, whatever the caller passed, so the cache stays bounded.
+        """
+        region = None
+        if level == "server" and parent is not None:
+            region = _match_index(parent, self.region_index)
+            if region is None:
+                return ()
+        if language is not None and language not in self.game_data.get(
+            "languages", ""
+        ).split("~"):
+            # served the default language's labels, cached as those
+            language = self.game_data.get("lang")
+        key = (level, region, language)
+        choices = self._choices.get(key)
+        if choices is None:
+            # the first thread to build them wins
+            choices = self._choices.setdefault(
+                key, self._build_choices(level, region, language)
+            )
+        return choices
+
+    def _build_choices(self, level, region, language):
+        game_code = self.game_code
+        if level == "server":
+            if region is None:
+                regions = self.game_data.get("sub_keys", "").split("~")
+                # regions whose record is missing have no servers to offer,
+                # MMOGameValidator.check reports them
+                return tuple(
+                    (region, self.choices(level, region, language))
+                    for region in regions
+                    if region and "%s/%s" % (game_code, region) in self.database
                 )
-        
-        if "sub_keys" in game_data:
-            for language in languages:
-                is_default_language = (
-                    language is None or language == game_data["lang"]
+            key = "%s/%s" % (game_code, region)
+            if key not in self.database:
+                return ()
+            if language is None:
+                character = {"game_code": game_code, "region": region}
+                choices = get_validation_rules(character).server_choices
+            else:
+                choices = self._localized_choices(level, key, language)
+        elif language is None:
+            if level == "faction":
+                choices = self.faction_choices
+            else:
+                choices = self.region_choices
+        else:
+            choices = self._localized_choices(level, game_code, language)
+        # the empty names a trailing "~" leaves in the data are no choice
+        return tuple(choice for choice in choices if choice[0])
+
+    def _localized_choices(self, level, key, language):
+        # a single label per name, in the language if the data has it
+        data = self.database.get(self._localized_key(key, language))
+        if data is None:
+            data = self.database[key]
+        make_choices = _make_none_choices if level == "faction" else _make_choices
+        return make_choices(data, translated=True) or make_choices(data)
+
+    def latin_names(self, region, server, server_area):
+        """Return the latinized names of a region, server and server area.
+
+        Only the fields that resolve to a record are present in the result.
+        """
+        key = (region, server, server_area)
+        names = self._latin_names.get(key)
+        if names is not None:
+            return names
+        names = {}
+        database = self.database
+        region_data = database.get("%s/%s" % (self.game_code, region))
+        if region_data:
+            names["region"] = region_data.get("lname", region_data.get("name", region))
+            key_prefix = "%s/%s/%s" % (self.game_code, region, server)
+            server_data = database.get(key_prefix)
+            if server_data:
+                names["server"] = server_data.get(
+                    "lname", server_data.get("name", server)
                 )
-                matched_region = None
-                matched_server = None
-                if is_default_language:
-                    localized_game_data = database[game_code]
-                else:
-                    localized_game_data = database[
-                        "%s--%s" % (game_code, language)
-                    ]
-                localized_region_choices = _make_choices(localized_game_data)
-                region_choices += localized_region_choices
-                existing_choice = region is not None
-                matched_region = region = _match_choices(
-                    character.get("region"), localized_region_choices
+                server_area_data = database.get("%s/%s" % (key_prefix, server_area))
+                if server_area_data:
+                    names["server_area"] = server_area_data.get(
+                        "lname", server_area_data.get("name", server_area)
+                    )
+        if len(self._latin_names) >= LATIN_CACHE_SIZE:
+            self._latin_names.clear()
+        self._latin_names[key] = names
+        return names
+
+    def name_check(self, matchers, levels):
+        """Return the shared ``_NameCheck`` of a path's matchers."""
+        key = (tuple(matchers), tuple(levels))
+        check = self._name_checks.get(key)
+        if check is None:
+            check = self._name_checks.setdefault(key, _NameCheck(matchers, levels))
+        return check
+
+    def level(self, key, language):
+        key = self._localized_key(key, language)
+        level = self._levels.get(key)
+        if level is None:
+            compiled = _CompiledLevel(self.database[key])
+            # a level compiled by two threads at once is shared by both
+            level = self._levels.setdefault(key, compiled)
+            if level is compiled and level.matcher is not None and _stats is not None:
+                _stats.count(self.game_code, "regexes_compiled")
+        return level
+
+
+def _get_compile_lock(game_code):
+    return _COMPILE_LOCKS[hash(game_code) % _LOCK_STRIPES]
+
+
+def _get_compiled_game(game_code):
+    game_data, database = _load_game_data(game_code)
+    compiled = _COMPILED_GAMES.get(game_code)
+    if compiled is not None and compiled.database is database:
+        return compiled
+    with _get_compile_lock(game_code):
+        # another thread may have compiled it while this one waited
+        game_data, database = _load_game_data(game_code)
+        compiled = _COMPILED_GAMES.get(game_code)
+        if compiled is not None and compiled.database is database:
+            return compiled
+        stats = _stats
+        if stats is not None:
+            start = _timer()
+        game = _CompiledGame(game_code, game_data, database)
+        _COMPILED_GAMES[game_code] = game
+        if compiled is not None:
+            # the file changed on disk, rules built from it are stale
+            _RULES_CACHE.discard(lambda key: key[0] == game_code)
+        if stats is not None:
+            stats.timing(game_code, "compile_game", _timer() - start)
+    return game
+
+
+def _compile_rules(game, character):
+    game_code = game.game_code
+    character_name_matchers = list(game.character_name_matchers)
+    character_name_levels = ["game_code"] * len(character_name_matchers)
+    server_choices = []
+    server_levels = []
+    server_area_choices = []
+    region = None
+    server = None
+    server_area = None
+
+    for language, is_default_language, game_level in game.languages:
+        matched_server = None
+        existing_choice = region is not None
+        matched_region = region = _match_index(
+            character.get("region"), game_level.index
+        )
+        if not matched_region:
+            continue
+        # third level of data is for cities
+        region_level = game.level("%s/%s" % (game_code, region), language)
+        if not existing_choice and region_level.matcher:
+            character_name_matchers.append(region_level.matcher)
+            character_name_levels.append("region")
+        if region_level.has_sub_keys:
+            server_choices += region_level.choices
+            server_levels.append(region_level)
+            existing_choice = server is not None
+            matched_server = server = _match_index(
+                character.get("server"), region_level.index
+            )
+        if not matched_server:
+            continue
+        # fourth level of data is for dependent sublocalities
+        server_level = game.level("%s/%s/%s" % (game_code, region, server), language)
+        if not existing_choice and server_level.matcher:
+            character_name_matchers.append(server_level.matcher)
+            character_name_levels.append("server")
+        if server_level.has_sub_keys:
+            server_area_choices += server_level.choices
+            existing_choice = server_area is not None
+            matched_server_area = server_area = _match_index(
+                character.get("server_area"), server_level.index
+            )
+            if matched_server_area:
+                server_area_level = game.level(
+                    "%s/%s/%s/%s" % (game_code, region, server, server_area),
+                    language,
                 )
-                
-                if matched_region:
-                    # third level of data is for cities
-                    if is_default_language:
-                        region_data = database[
-                            "%s/%s" % (game_code, region)
-                        ]
-                    else:
-                        region_data = database[
-                            "%s/%s--%s" % (game_code, region, language)
-                        ]
-                    if not existing_choice:
-                        if "regex" in region_data:
-                            character_name_matchers.append(
-                                re.compile("^" + region_data["regex"])
-                            )
-
-                    if "sub_keys" in region_data:
-                        localized_server_choices = _make_choices(region_data)
-                        server_choices += localized_server_choices
-                        existing_choice = server is not None
-                        matched_server = server = _match_choices(
-                            character.get("server"), localized_server_choices
-                        )
-                    if matched_server:
-                        # fourth level of data is for dependent sublocalities
-                        if is_default_language:
-                            server_data = database[
-                                "%s/%s/%s" % (game_code, region, server)
-                            ]
-                        else:
-                            server_data = database[
-                                "%s/%s/%s--%s"
-                                % (game_code, region, server, language)
-                            ]
-                        if not existing_choice:
-                            if "regex" in server_data:
-                                character_name_matchers.append(
-                                    re.compile("^" + server_data["regex"])
-                                )
-                        if "sub_keys" in server_data:
-                            localized_server_area_choices = _make_choices(server_data)
-                            server_area_choices += localized_server_area_choices
-                            existing_choice = server_area is not None
-                            matched_server_area = server_area = _match_choices(
-                                character.get("server_area"), localized_server_area_choices
-                            )
-                            if matched_server_area:
-                                if is_default_language:
-                                    server_area_data = database[
-                                        "%s/%s/%s/%s"
-                                        % (game_code, region, server, server_area)
-                                    ]
-                                else:
-                                    server_area_data = database[
-                                        "%s/%s/%s/%s--%s"
-                                        % (
-                                            game_code,
-                                            region,
-                                            server,
-                                            server_area,
-                                            language,
-                                        )
-                                    ]
-                                if not existing_choice:
-                                    if "regex" in server_area_data:
-                                        character_name_matchers.append(
-                                            re.compile("^" + server_area_data["regex"])
-                                        )
-        region_choices = _compact_choices(region_choices)
+                if not existing_choice and server_area_level.matcher:
+                    character_name_matchers.append(server_area_level.matcher)
+                    character_name_levels.append("server_area")
+    server_index = None
+    if len(server_levels) == 1:
+        # the usual case, every server of the region is shared by its rules
+        server_choices, server_index = server_levels[0].compacted()
+    elif game_code in game.database:
         server_choices = _compact_choices(server_choices)
-        faction_choices = _compact_choices(faction_choices)
 
     return ValidationRules(
         game_code,
-        game_name,
-        game_short_name,
-        character_format,
-        allowed_fields,
-        required_fields,
-        upper_fields,
-        faction_type,
-        faction_choices,
-        region_type,
-        region_choices,
-        server_type,
+        game.game_name,
+        game.game_short_name,
+        game.character_format,
+        game.allowed_fields,
+        game.required_fields,
+        game.upper_fields,
+        game.faction_type,
+        game.faction_choices,
+        game.region_type,
+        game.region_choices,
+        game.server_type,
         server_choices,
-        character_name_type,
+        game.character_name_type,
         character_name_matchers,
-        character_name_prefix,
+        game.character_name_prefix,
+        faction_index=game.faction_index,
+        region_index=game.region_index,
+        server_index=server_index,
+        character_name_check=game.name_check(
+            character_name_matchers, character_name_levels
+        ),
+    )
+
+
+def _rules_cache_key(value):
+    # choices are matched on the stripped, lowercased value so any two
+    # inputs equal under that transformation share the same rules
+    if value:
+        return value.strip().lower()
+    return value
+
+
+def _get_rules_key(character):
+    return (
+        character.get("game_code", "").upper(),
+        _rules_cache_key(character.get("region")),
+        _rules_cache_key(character.get("server")),
+        _rules_cache_key(character.get("server_area")),
     )
 
 
+def get_validation_rules(character):
+    key = _get_rules_key(character)
+    rules = _RULES_CACHE.get(key)
+    stats = _stats
+    if rules is None:
+        if stats is not None:
+            start = _timer()
+        game = _get_compiled_game(key[0])
+        rules = _compile_rules(game, character)
+        if _COMPILED_GAMES.get(key[0]) is game:
+            # not when a reload swapped the game out meanwhile
+            _RULES_CACHE.set(key, rules)
+        if stats is not None:
+            stats.count(key[0], "rules_cache_misses")
+            stats.timing(key[0], "compile_rules", _timer() - start)
+    elif stats is not None:
+        stats.count(key[0], "rules_cache_hits")
+    return rules
+
+
+CHOICE_LEVELS = ("faction", "region", "server")
+
+
+def get_choices(game_code, level, parent=None, language=None):
+    """Return the ``(name, label)`` choices of a level as a cached tuple.
+
+    ``level`` is one of ``CHOICE_LEVELS``; the servers are those of the
+    ``parent`` region, or with no ``parent`` the whole server tree as
+    ``(region, servers)`` pairs. Without a ``language`` the choices are
+    the ones ``get_validation_rules`` gives, every label in every language;
+    with one there is a single label per name in that language, falling back
+    to the game's default language.
+    """
+    if level not in CHOICE_LEVELS:
+        raise ValueError("%r is not a choice level" % (level,))
+    game_code = game_code.upper()
+    game = _COMPILED_GAMES.get(game_code)
+    if game is None:
+        game = _get_compiled_game(game_code)
+    return game.choices(level, parent, language)
+
+
 class InvalidCharacter(ValueError):
-    def __init__(self, message, errors):
+    def __init__(self, message, errors, suggestions=None):
         super(InvalidCharacter, self).__init__(message)
         self.errors = errors
+        self.suggestions = suggestions or {}
 
 
-def _normalize_field(name, rules, data, choices, errors):
-    value = data.get(name)
-    if name in rules.upper_fields and value is not None:
-        value = value.upper()
-        data[name] = value
-    if name not in rules.allowed_fields:
-        data[name] = ""
-    elif not value and name in rules.required_fields:
-        errors[name] = "required"
-    elif choices:
-        if value or name in rules.required_fields:
-            value = _match_choices(value, choices)
-            if value is not None:
-                data[name] = value
+def _apply_field_plan(plan, data, errors):
+    # normalizes in place the fields of a ValidationRules._plan_fields plan
+    for name, upper, allowed, required, choice_index, check in plan:
+        value = data.get(name)
+        if upper and value is not None and not (choice_index and value.isascii()):
+            value = value.upper()
+        if not allowed:
+            data[name] = ""
+        elif not value:
+            if required:
+                errors[name] = "required"
+            data[name] = ""
+        elif choice_index:
+            match = _match_index(value, choice_index)
+            if match is not None:
+                data[name] = match
             else:
+                # an ASCII choice is matched regardless of case and only
+                # uppercased once it turns out invalid
+                errors[name] = "invalid"
+                data[name] = value.upper() if upper else value
+        else:
+            if check is not None and check.rejected_level(value):
                 errors[name] = "invalid"
-    if not value:
-        data[name] = ""
+            data[name] = value
 
 
-def normalize_character(character):
+def _clean_character(character, rules):
+    stats = _stats
+    if stats is not None:
+        start = _timer()
     errors = {}
+    cleaned_data = character.copy()
+    game_code = cleaned_data.get("game_code")
+    if not game_code:
+        errors["game_code"] = "required"
+    else:
+        cleaned_data["game_code"] = game_code.upper()
+    _apply_field_plan(rules._choice_plan, cleaned_data, errors)
+    if stats is not None:
+        now = _timer()
+        stats.timing(rules.game_code, "match_choices", now - start)
+        start = now
+    _apply_field_plan(rules._name_plan, cleaned_data, errors)
+    if stats is not None:
+        stats.timing(rules.game_code, "match_name", _timer() - start)
+        _record_failures(stats, rules.game_code, errors)
+    return cleaned_data, errors
+
+
+def _record_failures(stats, game_code, errors):
+    for field, error in errors.items():
+        stats.failure(game_code, field, error)
+
+
+# the fields a result depends on, and the ones normalization rewrites
+_RESULT_KEY_FIELDS = tuple(sorted(KNOWN_FIELDS | {"server_area"}))
+_NORMALIZED_FIELDS = (
+    "game_code",
+    "region",
+    "faction",
+    "server",
+    "character_name",
+    "sorting_code",
+)
+
+
+def _validate_character(character):
     try:
         rules = get_validation_rules(character)
     except ValueError:
-        errors["game_code"] = "invalid"
-    else:
+        errors = {"game_code": "invalid"}
+        if _stats is not None:
+            _record_failures(_stats, character.get("game_code", "").upper(), errors)
+        return None, errors
+    return _clean_character(character, rules)
+
+
+def _validate_character_cached(cache, character):
+    key = tuple(map(character.get, _RESULT_KEY_FIELDS))
+    try:
+        result = cache.lookup(key)
+    except TypeError:
+        # unhashable field values are not cached
+        return _validate_character(character)
+    game_code = character.get("game_code", "").upper()
+    if result is not None:
+        normalized, errors = result
+        if errors:
+            if _stats is not None:
+                _record_failures(_stats, game_code, errors)
+            return None, dict(errors)
         cleaned_data = character.copy()
-        game_code = cleaned_data.get("game_code")
-        if not game_code:
-            errors["game_code"] = "required"
-        else:
-            cleaned_data["game_code"] = game_code.upper()
-        _normalize_field(
-            "region", rules, cleaned_data, rules.region_choices, errors
-        )
-        _normalize_field(
-            "faction", rules, cleaned_data, rules.faction_choices, errors
-        )
-        _normalize_field("server", rules, cleaned_data, rules.server_choices, errors)
-        # _normalize_field(
-        #     "server_area", rules, cleaned_data, rules.server_area_choices, errors
-        # )
-        _normalize_field("character_name", rules, cleaned_data, [], errors)
-        character_name = cleaned_data.get("character_name", "")
-        if rules.character_name_matchers and character_name:
-            for matcher in rules.character_name_matchers:
-                if not matcher.match(character_name):
-                    errors["character_name"] = "invalid"
-                    break
-        _normalize_field("sorting_code", rules, cleaned_data, [], errors)
+        cleaned_data.update(normalized)
+        return cleaned_data, errors
+    cleaned_data, errors = _validate_character(character)
+    normalized = None
+    if not errors:
+        normalized = {
+            field: cleaned_data[field]
+            for field in _NORMALIZED_FIELDS
+            if field in cleaned_data
+        }
+    cache.store(key, game_code, normalized, dict(errors))
+    return cleaned_data, errors
+
+
+def normalize_character(character, suggest=0):
+    """Return the normalized character or raise ``InvalidCharacter``.
+
+    With ``suggest`` set to a positive number the exception also carries up
+    to that many closest valid choices for every invalid region, server and
+    faction in its ``suggestions``.
+    """
+    cache = _result_cache
+    if cache is not None:
+        cleaned_data, errors = _validate_character_cached(cache, character)
+    else:
+        cleaned_data, errors = _validate_character(character)
     if errors:
-        raise InvalidCharacter("Invalid character", errors)
+        suggestions = None
+        # without a valid game code there is nothing to suggest from
+        if suggest > 0 and "game_code" not in errors:
+            from .suggest import get_suggestions
+
+            suggestions = get_suggestions(character, errors, limit=suggest)
+        raise InvalidCharacter("Invalid character", errors, suggestions)
     return cleaned_data
 
 
-def _format_character_line(line_format, character, rules):
-    def _get_field(name):
-        value = character.get(name, "")
-        if name in rules.upper_fields:
-            value = value.upper()
-        return value
+_NO_ERRORS = types.MappingProxyType({})
+
+
+class ValidationResult(object):
+    """The outcome of ``validate_character``, true when the character is valid.
+
+    ``cleaned_data`` is the normalized character, ``None`` when ``errors``
+    is not empty. ``errors`` of a valid character is an empty read-only
+    mapping.
+    """
+
+    __slots__ = ["cleaned_data", "errors"]
+
+    def __init__(self, cleaned_data, errors):
+        self.cleaned_data = cleaned_data
+        self.errors = errors
+
+    @property
+    def valid(self):
+        return not self.errors
+
+    def __bool__(self):
+        return not self.errors
+
+    def __repr__(self):
+        return "ValidationResult(cleaned_data=%r, errors=%r)" % (
+            self.cleaned_data,
+            self.errors,
+        )
+
+
+def validate_character(character):
+    """Validate and normalize ``character`` without raising.
 
-    replacements = {
-        "%%%s" % code: _get_field(field_name)
-        for code, field_name in FIELD_MAPPING.items()
+    Returns a ``ValidationResult``; unlike ``normalize_character`` an invalid
+    character costs no exception.
+    """
+    cache = _result_cache
+    if cache is not None:
+        cleaned_data, errors = _validate_character_cached(cache, character)
+    else:
+        cleaned_data, errors = _validate_character(character)
+    if errors:
+        return ValidationResult(None, errors)
+    return ValidationResult(cleaned_data, _NO_ERRORS)
+
+
+def normalize_characters(characters):
+    """Normalize an iterable of characters lazily, in input order.
+
+    Yields a ``(cleaned_data, errors)`` pair per character instead of
+    raising ``InvalidCharacter``; ``cleaned_data`` is ``None`` whenever
+    ``errors`` is not empty. A field set to anything but a string (or a
+    ``game_code`` set to ``None``) gets an ``invalid`` error and a character
+    resolving to a region or server whose record is missing from the game
+    data a ``data_error`` for ``game_code`` instead of ending the stream.
+    Rules are resolved once per
+    distinct game code, region and server, and only that bounded set of
+    rules is held in memory so arbitrarily long iterables can be streamed
+    through.
+    """
+    rules_by_key = {}
+    for character in characters:
+        try:
+            key = _get_rules_key(character)
+        except AttributeError:
+            errors = _field_type_errors(character)
+            if not errors:
+                raise
+            if _stats is not None:
+                _record_failures(_stats, "", errors)
+            yield None, errors
+            continue
+        rules = rules_by_key.get(key)
+        if rules is None:
+            try:
+                rules = get_validation_rules(character)
+            except ValueError:
+                # remember unknown game codes too
+                rules = "invalid"
+            except KeyError:
+                # and rules needing a record the game data lacks
+                rules = "data_error"
+            if len(rules_by_key) >= RULES_CACHE_SIZE:
+                rules_by_key.clear()
+            rules_by_key[key] = rules
+        if isinstance(rules, str):
+            # the game_code error of characters without rules
+            errors = {"game_code": rules}
+            if _stats is not None:
+                _record_failures(_stats, key[0], errors)
+            yield None, errors
+            continue
+        try:
+            cleaned_data, errors = _clean_character(character, rules)
+        except (AttributeError, TypeError):
+            errors = _field_type_errors(character)
+            if not errors:
+                raise
+            if _stats is not None:
+                _record_failures(_stats, key[0], errors)
+            yield None, errors
+            continue
+        if errors:
+            cleaned_data = None
+        yield cleaned_data, errors
+
+
+def _field_type_errors(character):
+    # only looked for once normalizing failed on a field of another type
+    return {
+        field: "invalid"
+        for field in _RESULT_KEY_FIELDS
+        if field in character
+        and not isinstance(character[field], str)
+        and (field == "game_code" or character[field] is not None)
     }
 
-    fields = re.split("(%.)", line_format)
-    fields = [replacements.get(f, f) for f in fields]
-    return "".join(fields).strip()
 
+_FORMAT_CODES = {"%%%s" % code: name for code, name in FIELD_MAPPING.items()}
+_FORMAT_TEMPLATES = {}
 
-def get_field_order(character, latin=False):
 
+class _FormatTemplate(object):
+    """A character format parsed into lines of literal and field tokens."""
+
+    __slots__ = ["lines", "field_order"]
+
+    def __init__(self, character_format):
+        import re
+
+        lines = []
+        for line_format in character_format.split("%n"):
+            tokens = []
+            for field in re.split("(%.)", line_format):
+                name = _FORMAT_CODES.get(field)
+                if name is not None:
+                    tokens.append((True, name))
+                elif field:
+                    tokens.append((False, field))
+            lines.append(tuple(tokens))
+        self.lines = tuple(lines)
+        self.field_order = tuple(
+            tuple(name for is_field, name in tokens if is_field) for tokens in lines
+        )
+
+
+def _get_format_template(character_format):
+    template = _FORMAT_TEMPLATES.get(character_format)
+    if template is None:
+        template = _FORMAT_TEMPLATES[character_format] = _FormatTemplate(
+            character_format
+        )
+    return template
+
+
+def _format_character_line(tokens, character, rules):
+    parts = []
+    for is_field, value in tokens:
+        if is_field:
+            name = value
+            value = character.get(name, "")
+            if name in rules.upper_fields:
+                value = value.upper()
+        parts.append(value)
+    return "".join(parts).strip()
+
+
+def get_field_order(character, latin=False):
     rules = get_validation_rules(character)
-    character_format = rules.character_format
-    character_lines = character_format.split("%n")
-    replacements = {
-        "%%%s" % code: field_name for code, field_name in FIELD_MAPPING.items()
-    }
-    all_lines = []
-    for line in character_lines:
-        fields = re.split("(%.)", line)
-        single_line = [replacements.get(field) for field in fields]
-        single_line = list(filter(None, single_line))
-        all_lines.append(single_line)
-    return all_lines
+    template = _get_format_template(rules.character_format)
+    return [list(fields) for fields in template.field_order]
 
 
 def format_character(character, latin=False):
     rules = get_validation_rules(character)
-    character_format = rules.character_format
-    character_line_formats = character_format.split("%n")
+    template = _get_format_template(rules.character_format)
     character_lines = [
-        _format_character_line(lf, character, rules) for lf in character_line_formats
+        _format_character_line(tokens, character, rules) for tokens in template.lines
     ]
     character_lines.append(rules.game_name)
     character_lines = filter(None, character_lines)
     return "\n".join(character_lines)
 
 
-def latinize_character(character, normalized=False):
-    if not normalized:
-        character = normalize_character(character)
+def _get_game(game_code):
+    game = _COMPILED_GAMES.get(game_code)
+    if game is None:
+        game = _get_compiled_game(game_code)
+    return game
+
+
+def _latinize(character, game):
     cleaned_data = character.copy()
-    game_code = character.get("game_code", "").upper()
-    dummy_game_data, database = _load_game_data(game_code)
-    if game_code:
+    if game is not None:
         region = character["region"]
         if region:
-            key = "%s/%s" % (game_code, region)
-            region_data = database.get(key)
-            if region_data:
-                cleaned_data["region"] = region_data.get(
-                    "lname", region_data.get("name", region)
+            cleaned_data.update(
+                game.latin_names(
+                    region, character.get("server"), character.get("server_area", "")
                 )
-                server = character["server"]
-                key = "%s/%s/%s" % (game_code, region, server)
-                server_data = database.get(key)
-                if server_data:
-                    cleaned_data["server"] = server_data.get(
-                        "lname", server_data.get("name", server)
-                    )
-                    server_area = character["server_area"]
-                    key = "%s/%s/%s/%s" % (game_code, region, server, server_area)
-                    server_area_data = database.get(key)
-                    if server_area_data:
-                        cleaned_data["server_area"] = server_area_data.get(
-                            "lname", server_area_data.get("name", server_area)
-                        )
-    return cleaned_data
\ No newline at end of file
+            )
+    return cleaned_data
+
+
+def latinize_character(character, normalized=False):
+    if not normalized:
+        character = normalize_character(character)
+    game_code = character.get("game_code", "").upper()
+    return _latinize(character, _get_game(game_code) if game_code else None)
+
+
+def latinize_characters(characters, normalized=False):
+    """Latinize an iterable of characters lazily, in input order.
+
+    Yields ``(cleaned_data, errors)`` pairs like ``normalize_characters``,
+    which is used to normalize the characters first unless ``normalized``
+    is true. Latinized names come from a per game cache, so looking them up
+    costs a dict lookup once a region and server have been seen.
+    """
+    if normalized:
+        results = ((character, {}) for character in characters)
+    else:
+        results = normalize_characters(characters)
+    games = {"": None}
+    for cleaned_data, errors in results:
+        if errors:
+            yield cleaned_data, errors
+            continue
+        game_code = cleaned_data.get("game_code", "").upper()
+        game = games.get(game_code, False)
+        if game is False:
+            game = games[game_code] = _get_game(game_code)
+        yield _latinize(cleaned_data, game), errors
+
+
+def _preload_game(game_code):
+    game = _get_compiled_game(game_code.upper())
+    prefix = game.game_code + "/"
+    for key in game.database:
+        if key.startswith(prefix):
+            level = game.level(key, None)
+            if level.has_sub_keys:
+                level.compacted()
+    _get_format_template(game.character_format)
+    get_validation_rules({"game_code": game.game_code})
+
+
+def preload(game_codes="all", trace_memory=True, freeze=False):
+    """Load and compile games ahead of time, typically before forking.
+
+    Every region and server of each game is compiled along with its format
+    template so workers forked afterwards share them copy-on-write instead
+    of each building private copies. ``game_codes`` is an iterable of game
+    codes or ``"all"``. With ``freeze`` the garbage collector is told to
+    leave everything allocated so far alone (``gc.freeze()``), which keeps
+    collections in the workers from touching the shared pages.
+
+    Returns a report with the games loaded, the ones that failed with their
+    error, the elapsed seconds and, with ``trace_memory``, the bytes still
+    allocated by the warmup.
+    """
+    import gc
+    import tracemalloc
+
+    if game_codes == "all":
+        game_codes = available_game_codes()
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    start = _timer()
+    loaded = []
+    failed = {}
+    for game_code in game_codes:
+        try:
+            _preload_game(game_code)
+        except (KeyError, ValueError) as e:
+            failed[game_code] = repr(e)
+        else:
+            loaded.append(game_code)
+    report = {"games": loaded, "failed": failed, "seconds": _timer() - start}
+    if trace_memory:
+        report["memory"] = tracemalloc.get_traced_memory()[0] - memory_before
+        if tracing:
+            tracemalloc.stop()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return report
+
+
+def _recompile_game(game_code):
+    with _get_compile_lock(game_code):
+        previous = _COMPILED_GAMES.get(game_code)
+        if previous is None:
+            return
+        game_data, database = _load_game_data(game_code)
+        game = _CompiledGame(game_code, game_data, database)
+        # compile what was in use before the swap so no request pays for it
+        for key in list(previous._levels):
+            if key in database:
+                level = game.level(key, None)
+                if level.has_sub_keys:
+                    level.compacted()
+        _COMPILED_GAMES[game_code] = game
+        _RULES_CACHE.discard(lambda key: key[0] == game_code)
+
+
+def reload_changed():
+    """Reload the game databases whose data changed on disk.
+
+    Only the games whose file (or whose part of the bundle) changed are
+    parsed and recompiled, then swapped in; validations already running
+    keep using the rules they hold and caches of every other game are left
+    alone. A change to the ``zz`` defaults recompiles every game. A game
+    whose new data cannot be parsed or compiled keeps its previous data and
+    rules until its file changes again. Returns the codes of the games
+    reloaded.
+    """
+    changed = set()
+    # rebuilt bundles first: loading a database below would swap a rebuilt
+    # bundle in without comparing the games it holds
+    for path, (_mtime, bundle) in list(_BUNDLE_CACHE.items()):
+        try:
+            current = _load_bundle(path)
+        except (OSError, ValueError):
+            continue
+        if current is not None and current is not bundle:
+            changed.update(c.upper() for c in current.adopt_unchanged(bundle))
+    for path, (mtime, database, game_code) in list(_DATABASE_CACHE.items()):
+        try:
+            current_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            # keep serving what we have until the file is back
+            continue
+        # data that cannot be parsed leaves the previous database in place
+        if current_mtime != mtime and _load_database(game_code) is not database:
+            changed.add(game_code.upper())
+    # games synced into VALIDATION_CACHE_DIR since they were loaded and
+    # files modified after the bundle they were loaded from was built
+    for game_code in ["ZZ"] + list(_COMPILED_GAMES):
+        try:
+            path = _get_validation_data_path(game_code)
+            if path in _DATABASE_CACHE or not os.path.exists(path):
+                continue
+            _load_database(game_code.lower())
+        except ValueError:
+            continue
+        if path in _DATABASE_CACHE:
+            changed.add(game_code)
+    if "ZZ" in changed:
+        changed.update(list(_COMPILED_GAMES))
+    reloaded = []
+    for game_code in sorted(changed):
+        try:
+            _recompile_game(game_code)
+        except (KeyError, ValueError):
+            continue
+        reloaded.append(game_code)
+    return reloaded
@@ -0,0 +1,231 @@
+"""Validate and normalize a stream of characters.
+
+    python -m MMOGameValidator characters.jsonl -o clean.jsonl -e errors.jsonl
+
+Reads JSON Lines or CSV from a file or stdin one record at a time and writes
+every valid record, normalized, to the output and every invalid one, with
+its errors, to the error output. A throughput summary is printed to stderr.
+
+A record whose fields are not strings gets an ``invalid`` error for each of
+them, a CSV row with more cells than the header an ``input`` one and one
+resolving to a record missing from the game data a ``data_error`` for
+``game_code``; the run carries on with the next record.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import contextlib
+import csv
+import functools
+import io
+import json
+import sys
+import time
+
+from MMOGameValidator import (
+    KNOWN_FIELDS,
+    InvalidCharacter,
+    format_character,
+    latinize_character,
+    normalize_character,
+)
+
+FORMATTED_FIELD = "formatted"
+STRING_FIELDS = KNOWN_FIELDS | {"server_area"}
+
+
+def _open(stack, path, mode, default):
+    if path == "-":
+        stream = io.TextIOWrapper(default.buffer, encoding="utf-8", newline="")
+        # leave the standard stream itself open
+        stack.callback(stream.detach)
+        return stream
+    return stack.enter_context(io.open(path, mode, encoding="utf-8", newline=""))
+
+
+def _read_jsonl(stream):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            character = json.loads(line)
+        except ValueError:
+            character = None
+        if not isinstance(character, dict):
+            character = None
+        yield line_number, character
+
+
+def _check_fields(character):
+    # null (or a missing CSV cell) counts as an absent field, any other
+    # value of a field the validator reads must be a string
+    cleaned = {}
+    errors = {}
+    for field, value in character.items():
+        if field is None:
+            # csv.DictReader keeps the cells past the header under None
+            errors["input"] = "invalid"
+        elif field not in STRING_FIELDS:
+            cleaned[field] = value
+        elif isinstance(value, str):
+            cleaned[field] = value
+        elif value is not None:
+            errors[field] = "invalid"
+    return cleaned, errors
+
+
+def _process(item, formatted=False, latinized=False):
+    line_number, character = item
+    if character is None:
+        return line_number, character, None, {"input": "invalid"}
+    cleaned_character, errors = _check_fields(character)
+    if errors:
+        return line_number, character, None, errors
+    try:
+        cleaned_data = normalize_character(cleaned_character)
+    except InvalidCharacter as e:
+        return line_number, character, None, e.errors
+    except KeyError:
+        # the game data lacks a record the character resolves to
+        return line_number, character, None, {"game_code": "data_error"}
+    if latinized:
+        cleaned_data = latinize_character(cleaned_data, normalized=True)
+    if formatted:
+        cleaned_data[FORMATTED_FIELD] = format_character(cleaned_data)
+    return line_number, character, cleaned_data, None
+
+
+class _JSONLinesWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False))
+        self.stream.write("\n")
+
+
+class _CSVWriter(object):
+    def __init__(self, stream, fieldnames):
+        self.stream = stream
+        self.fieldnames = fieldnames
+        self.writer = None
+
+    def write(self, record):
+        if self.writer is None:
+            # fields not in the input header come from normalization
+            fieldnames = list(self.fieldnames)
+            fieldnames += sorted(set(record) - set(fieldnames))
+            self.writer = csv.DictWriter(
+                self.stream, fieldnames, extrasaction="ignore"
+            )
+            self.writer.writeheader()
+        self.writer.writerow(record)
+
+
+def _input_format(args):
+    if args.input_format:
+        return args.input_format
+    if args.input.lower().endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m MMOGameValidator",
+        description="Validate and normalize JSON Lines or CSV characters.",
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="input file, stdin by default"
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=["jsonl", "csv"],
+        help="guessed from the file extension, jsonl by default",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="valid records, stdout by default"
+    )
+    parser.add_argument(
+        "-e",
+        "--errors",
+        default="-",
+        help="invalid records as JSON Lines, stderr by default",
+    )
+    parser.add_argument(
+        "--format",
+        action="store_true",
+        help="add the format_character text as the %r field" % FORMATTED_FIELD,
+    )
+    parser.add_argument(
+        "--latinize", action="store_true", help="latinize the valid records"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="records per worker task"
+    )
+    args = parser.parse_args(argv)
+
+    input_format = _input_format(args)
+    process = functools.partial(
+        _process, formatted=args.format, latinized=args.latinize
+    )
+    stats = {"valid": 0, "invalid": 0}
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        input_stream = _open(stack, args.input, "r", sys.stdin)
+        output_stream = _open(stack, args.output, "w", sys.stdout)
+        error_stream = _open(stack, args.errors, "w", sys.stderr)
+        if input_format == "csv":
+            reader = csv.DictReader(input_stream)
+            fieldnames = list(reader.fieldnames or [])
+            # line 1 is the header
+            items = enumerate(reader, 2)
+            writer = _CSVWriter(output_stream, fieldnames)
+        else:
+            items = _read_jsonl(input_stream)
+            writer = _JSONLinesWriter(output_stream)
+        error_writer = _JSONLinesWriter(error_stream)
+
+        if args.jobs > 1:
+            from MMOGameValidator.parallel import ParallelValidator
+
+            validator = ParallelValidator(jobs=args.jobs, chunk_size=args.chunk_size)
+            results = validator.map(process, items)
+        else:
+            validator = None
+            results = (process(item) for item in items)
+        try:
+            for line_number, character, cleaned_data, errors in results:
+                if errors:
+                    stats["invalid"] += 1
+                    error_writer.write(
+                        {"line": line_number, "errors": errors, "input": character}
+                    )
+                else:
+                    stats["valid"] += 1
+                    writer.write(cleaned_data)
+        finally:
+            if validator is not None:
+                validator.close()
+
+    elapsed = time.perf_counter() - start
+    total = stats["valid"] + stats["invalid"]
+    print(
+        "%d records (%d valid, %d invalid) in %.2fs, %.0f records/s"
+        % (
+            total,
+            stats["valid"],
+            stats["invalid"],
+            elapsed,
+            total / elapsed if elapsed else 0,
+        ),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from __future__ import unicode_literals
+
+import asyncio
+
+import MMOGameValidator
+from MMOGameValidator import (
+    format_character,
+    get_validation_rules,
+    normalize_character,
+)
+
+# (event loop, game code) -> future of the load running in the executor
+_PENDING_LOADS = {}
+
+
+def _forget_load(key):
+    def callback(future):
+        _PENDING_LOADS.pop(key, None)
+
+    return callback
+
+
+async def _ensure_game_loaded(character):
+    game_code = character.get("game_code", "").upper()
+    if game_code in MMOGameValidator._COMPILED_GAMES:
+        return
+    loop = asyncio.get_running_loop()
+    key = (loop, game_code)
+    future = _PENDING_LOADS.get(key)
+    if future is None:
+        future = loop.run_in_executor(
+            None, MMOGameValidator._get_compiled_game, game_code
+        )
+        _PENDING_LOADS[key] = future
+        future.add_done_callback(_forget_load(key))
+    try:
+        # one cancelled caller must not cancel the load shared with others
+        await asyncio.shield(future)
+    except ValueError:
+        # unknown game codes are reported by the synchronous call
+        pass
+
+
+async def aget_validation_rules(character):
+    """Like ``get_validation_rules`` but reads game data off the event loop.
+
+    Concurrent calls for a game that is not loaded yet share a single load
+    and once a game is loaded no executor is involved at all.
+    """
+    await _ensure_game_loaded(character)
+    return get_validation_rules(character)
+
+
+async def anormalize_character(character):
+    await _ensure_game_loaded(character)
+    return normalize_character(character)
+
+
+async def aformat_character(character, latin=False):
+    await _ensure_game_loaded(character)
+    return format_character(character, latin=latin)
@@ -0,0 +1,248 @@
+"""Compile every ``data/*.json`` file into a single memory-mapped bundle.
+
+The bundle starts with a header indexing every game, followed by every
+record stored as compact JSON and one record index per game. Only the header is read when the bundle is opened, a game's record index is read
+the first time the game is requested and every record is decoded on first
+access, so opening a bundle costs the same however many games it holds.
+
+Record fields that can be derived from their position (``id``, ``key`` and a
+``lang`` equal to the game's language) are dropped when building and
+restored on access.
+
+A bundle in the data directory is read instead of its files, except for the
+games whose file was modified after the bundle was built: those are read
+from their file until the bundle is rebuilt.
+
+    python -m MMOGameValidator.bundle [--data-dir DIR] [--output FILE]
+"""
+from __future__ import unicode_literals
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Mapping
+
+import MMOGameValidator
+from MMOGameValidator import BUNDLE_FILENAME
+
+MAGIC = b"MMOGVB1\0"
+_LENGTH = struct.Struct("<Q")
+_HEADER_OFFSET = len(MAGIC) + _LENGTH.size
+
+_STRIPPED_ID = 1
+_STRIPPED_KEY = 2
+_STRIPPED_LANG = 4
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _encode_record(path, record, lang):
+    record = dict(record)
+    flags = 0
+    if record.get("id") == "data/" + path:
+        del record["id"]
+        flags |= _STRIPPED_ID
+    if record.get("key") == path.rsplit("/", 1)[-1]:
+        del record["key"]
+        flags |= _STRIPPED_KEY
+    if lang is not None and record.get("lang") == lang:
+        del record["lang"]
+        flags |= _STRIPPED_LANG
+    return _dumps([flags, record])
+
+
+def _decode_record(path, data, lang):
+    flags, record = json.loads(data.decode("utf-8"))
+    if flags & _STRIPPED_ID:
+        record["id"] = "data/" + path
+    if flags & _STRIPPED_KEY:
+        record["key"] = path.rsplit("/", 1)[-1]
+    if flags & _STRIPPED_LANG:
+        record["lang"] = lang
+    return record
+
+
+def build_bundle(data_dir, output=None):
+    """Write every game database found in ``data_dir`` to one bundle file.
+
+    The bundle is written to ``output`` (``data_dir/games.bundle`` by
+    default) through a temporary file so readers never see it half written.
+    Returns the path of the bundle.
+    """
+    if output is None:
+        output = os.path.join(data_dir, BUNDLE_FILENAME)
+    games = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.json"))):
+        game_code = os.path.splitext(os.path.basename(path))[0].lower()
+        with io.open(path, encoding="utf-8") as data:
+            games.append((game_code, json.load(data)))
+
+    # offsets inside the body, made absolute once the header size is known
+    body = io.BytesIO()
+    header = {}
+    for game_code, database in games:
+        game_record = database.get(game_code.upper(), {})
+        lang = game_record.get("lang")
+        record_index = {}
+        digest = hashlib.sha1()
+        for path, record in database.items():
+            data = _encode_record(path, record, lang)
+            record_index[path] = [body.tell(), len(data)]
+            body.write(data)
+            digest.update(path.encode("utf-8"))
+            digest.update(data)
+        header[game_code] = {
+            "index": record_index,
+            "lang": lang,
+            "digest": digest.hexdigest(),
+        }
+
+    index_blobs = []
+    body_size = body.tell()
+    for game_code, _database in games:
+        index_blobs.append((game_code, _dumps(header[game_code].pop("index"))))
+    # the header stores absolute offsets so its own size depends on them,
+    # grow the estimate until it is stable
+    header_size = 0
+    while True:
+        start = _HEADER_OFFSET + header_size
+        offset = start + body_size
+        for game_code, blob in index_blobs:
+            header[game_code]["records"] = [offset, len(blob), start]
+            offset += len(blob)
+        header_data = _dumps(header)
+        if len(header_data) == header_size:
+            break
+        header_size = len(header_data)
+
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".bundle-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(MAGIC)
+            out.write(_LENGTH.pack(len(header_data)))
+            out.write(header_data)
+            out.write(body.getvalue())
+            for _game_code, blob in index_blobs:
+                out.write(blob)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return output
+
+
+class _GameDatabase(Mapping):
+    """Read-only view of one game's records, decoded on first access."""
+
+    def __init__(self, buffer, base, index, lang):
+        self._buffer = buffer
+        self._base = base
+        self._index = index
+        self._lang = lang
+        self._records = {}
+
+    def __getitem__(self, path):
+        try:
+            return self._records[path]
+        except KeyError:
+            pass
+        offset, length = self._index[path]
+        offset += self._base
+        data = self._buffer[offset : offset + length]
+        record = _decode_record(path, data, self._lang)
+        return self._records.setdefault(path, record)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+class GameBundle(object):
+    def __init__(self, path):
+        with io.open(path, "rb") as bundle_file:
+            self._buffer = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)
+            # a data file modified after this is served instead of the bundle
+            self.mtime = os.fstat(bundle_file.fileno()).st_mtime_ns
+        if self._buffer[: len(MAGIC)] != MAGIC:
+            raise ValueError("%r is not a game data bundle" % (path,))
+        (header_size,) = _LENGTH.unpack(self._buffer[len(MAGIC) : _HEADER_OFFSET])
+        header_data = self._buffer[_HEADER_OFFSET : _HEADER_OFFSET + header_size]
+        self.path = path
+        self._header = json.loads(header_data.decode("utf-8"))
+        self._databases = {}
+
+    def __contains__(self, game_code):
+        return game_code in self._header
+
+    def game_codes(self):
+        return sorted(self._header)
+
+    def is_loaded(self, game_code):
+        return game_code in self._databases
+
+    def digest(self, game_code):
+        entry = self._header.get(game_code)
+        return entry["digest"] if entry is not None else None
+
+    def adopt_unchanged(self, previous):
+        """Reuse the games ``previous`` loaded whose content did not change.
+
+        Returns the codes of the games ``previous`` loaded that changed or
+        disappeared.
+        """
+        changed = []
+        # other threads may still be loading games from previous
+        for game_code, database in list(previous._databases.items()):
+            if self.digest(game_code) == previous.digest(game_code):
+                self._databases.setdefault(game_code, database)
+            else:
+                changed.append(game_code)
+        return changed
+
+    def get_database(self, game_code):
+        database = self._databases.get(game_code)
+        if database is None:
+            entry = self._header.get(game_code)
+            if entry is None:
+                return None
+            offset, length, base = entry["records"]
+            index = json.loads(self._buffer[offset : offset + length].decode("utf-8"))
+            # every thread must get the same database, a different one is
+            # taken for changed data and recompiled
+            database = self._databases.setdefault(
+                game_code, _GameDatabase(self._buffer, base, index, entry["lang"])
+            )
+        return database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m MMOGameValidator.bundle",
+        description="Compile the game data directory into a single bundle.",
+    )
+    parser.add_argument("--data-dir", default=MMOGameValidator.VALIDATION_DATA_DIR)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    print(build_bundle(args.data_dir, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Check the game data files offline and compile them into a bundle.
+
+    python -m MMOGameValidator.check [--data-dir DIR] [--bundle [--output FILE]]
+
+Every problem the runtime would otherwise only hit, or silently work around,
+while serving requests is reported: records whose parent is missing or that
+their parent does not list, ``id`` and ``key`` fields disagreeing with the
+record's path, empty entries and mismatched lengths in ``~`` separated
+lists, format, required and upper codes missing from ``FIELD_MAPPING``,
+regexes that do not compile and localized records missing for a language.
+Each game is then compiled level by level the way the runtime does.
+
+Problems the runtime would fail on (missing records, files that do not
+decode, regexes or games that do not compile) are errors. The ones it works
+around (empty or duplicate list entries, mismatched list lengths, unknown
+codes, ``id`` and ``key`` fields disagreeing with the path) are warnings.
+The exit status is non-zero when there are errors; with ``--bundle`` the
+bundle is only written when there are none.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import glob
+import io
+import json
+import os
+import re
+import sys
+
+import MMOGameValidator
+
+DEFAULTS_CODE = "ZZ"
+FORMAT_CODE = re.compile(r"%(.?)")
+# lists holding one entry per entry of the list they are keyed on
+PARALLEL_LISTS = {
+    "sub_keys": [
+        "sub_names",
+        "sub_lnames",
+        "sub_lfnames",
+        "sub_isoids",
+        "sub_mores",
+        "sub_zips",
+    ],
+    "faction_keys": ["faction_names"],
+}
+DEFAULTS_REQUIRED = [
+    "fmt",
+    "require",
+    "region_name_type",
+    "locality_name_type",
+    "regex_name_type",
+]
+
+
+class Problem(object):
+    """A problem found in the data, ``blocking`` when it is an error."""
+
+    __slots__ = ["message", "blocking"]
+
+    def __init__(self, message, blocking=True):
+        self.message = message
+        self.blocking = blocking
+
+    def __str__(self):
+        if self.blocking:
+            return self.message
+        return "warning: %s" % (self.message,)
+
+    def __repr__(self):
+        return "Problem(%r, blocking=%r)" % (self.message, self.blocking)
+
+
+def errors(problems):
+    """Return the ``problems`` that are errors."""
+    return [problem for problem in problems if problem.blocking]
+
+
+def _split_path(path):
+    # "WCW/NA--fr" -> ("WCW/NA", "fr")
+    path, _separator, language = path.partition("--")
+    return path, language or None
+
+
+def _check_list(problem, record, name):
+    entries = record[name].split("~")
+    if "" in entries:
+        problem("%s has empty entries in %r" % (name, record[name]), False)
+    duplicates = sorted({entry for entry in entries if entries.count(entry) > 1})
+    if duplicates:
+        problem(
+            "%s lists %s more than once" % (name, ", ".join(duplicates)), False
+        )
+    return entries
+
+
+def _check_codes(problem, record, name, allowed):
+    if name not in record:
+        return
+    codes = record[name]
+    if name == "fmt":
+        codes = [match.group(1) for match in FORMAT_CODE.finditer(codes)]
+    unknown = sorted({code for code in codes if code not in allowed})
+    if unknown:
+        problem(
+            "%s uses %s, not in FIELD_MAPPING"
+            % (name, ", ".join("%%%s" % code for code in unknown)),
+            False,
+        )
+
+
+def _check_record(problem, database, path, record):
+    base_path, language = _split_path(path)
+    if record.get("id") not in (None, "data/" + base_path, "data/" + path):
+        problem("id %r does not match the path" % (record["id"],), False)
+    segments = base_path.split("/")
+    if "key" in record and record["key"] != segments[-1]:
+        problem("key %r does not match the path" % (record["key"],), False)
+    if len(segments) > 1:
+        parent_path = "/".join(segments[:-1])
+        if language is not None:
+            parent_path = "%s--%s" % (parent_path, language)
+        parent = database.get(parent_path)
+        if not segments[-1]:
+            problem("the path has an empty last segment")
+        elif parent is None:
+            problem("the parent record %r is missing" % (parent_path,))
+        elif segments[-1] not in parent.get("sub_keys", "").split("~"):
+            problem("the parent record %r does not list it" % (parent_path,), False)
+
+    for keys_name, list_names in PARALLEL_LISTS.items():
+        if keys_name not in record:
+            continue
+        keys = _check_list(problem, record, keys_name)
+        if keys_name == "sub_keys" and language is None and segments[-1]:
+            for key in keys:
+                child_path = "%s/%s" % (base_path, key)
+                if key and child_path not in database:
+                    problem("sub_keys lists %r but %r is missing" % (key, child_path))
+        for list_name in list_names:
+            if list_name in record:
+                length = len(record[list_name].split("~"))
+                if length != len(keys):
+                    problem(
+                        "%s has %d entries, %s has %d"
+                        % (list_name, length, keys_name, len(keys)),
+                        False,
+                    )
+
+    allowed = set(MMOGameValidator.FIELD_MAPPING)
+    _check_codes(problem, record, "fmt", allowed | {"n"})
+    _check_codes(problem, record, "require", allowed)
+    _check_codes(problem, record, "upper", allowed)
+    if "regex" in record:
+        try:
+            re.compile("^" + record["regex"] + "$")
+        except re.error as e:
+            problem("regex %r does not compile: %s" % (record["regex"], e))
+
+
+def check_database(game_code, database, defaults=None):
+    """Return the ``Problem`` list found in the ``database`` of ``game_code``.
+
+    ``defaults`` is the ``zz`` database the game's record is merged with.
+    """
+    game_code = game_code.upper()
+    problems = []
+
+    def problem_in(path):
+        def problem(message, blocking=True):
+            problems.append(Problem("%s: %s" % (path, message), blocking))
+
+        return problem
+
+    if game_code not in database:
+        problem_in(game_code)("the game record is missing")
+        return problems
+    for path, record in database.items():
+        if _split_path(path)[0].split("/")[0] != game_code:
+            problem_in(path)(
+                "the record is not part of game %s" % (game_code,), False
+            )
+            continue
+        _check_record(problem_in(path), database, path, record)
+
+    game_data = dict((defaults or {}).get(DEFAULTS_CODE, {}))
+    game_data.update(database[game_code])
+    for name in DEFAULTS_REQUIRED:
+        if name not in game_data:
+            problem_in(game_code)("%s is missing and has no default" % (name,))
+    if game_code == DEFAULTS_CODE or errors(problems):
+        return problems
+
+    languages = [None]
+    if "languages" in game_data:
+        languages = game_data["languages"].split("~")
+    for language in languages:
+        if language is None or language == game_data.get("lang"):
+            continue
+        for path in database:
+            localized_path = "%s--%s" % (path, language)
+            if "--" not in path and localized_path not in database:
+                problem_in(localized_path)("the localized record is missing")
+    if errors(problems):
+        return problems
+
+    # compile every level the runtime may compile
+    try:
+        game = MMOGameValidator._CompiledGame(game_code, game_data, database)
+        for language in languages:
+            for path in database:
+                if "--" not in path and "/" in path:
+                    game.level(path, language)
+    except Exception as e:
+        problem_in(game_code)("does not compile: %r" % (e,))
+    return problems
+
+
+def check_data_dir(data_dir):
+    """Return the ``Problem`` list found in every data file of ``data_dir``."""
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.json")))
+    databases = {}
+    problems = []
+    for path in paths:
+        game_code = os.path.splitext(os.path.basename(path))[0].upper()
+        try:
+            with io.open(path, encoding="utf-8") as data:
+                database = json.load(data)
+        except ValueError as e:
+            problems.append(
+                Problem("%s: not valid JSON: %s" % (os.path.basename(path), e))
+            )
+            continue
+        if not isinstance(database, dict):
+            problems.append(
+                Problem("%s: not a JSON object" % (os.path.basename(path),))
+            )
+            continue
+        databases[game_code] = database
+    defaults = databases.get(DEFAULTS_CODE)
+    if defaults is None:
+        problems.append(Problem("zz.json: the defaults file is missing"))
+    for game_code, database in sorted(databases.items()):
+        filename = "%s.json" % (game_code.lower(),)
+        problems.extend(
+            Problem("%s: %s" % (filename, problem.message), problem.blocking)
+            for problem in check_database(game_code, database, defaults)
+        )
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m MMOGameValidator.check",
+        description="Check the game data files and compile them into a bundle.",
+    )
+    parser.add_argument("--data-dir", default=MMOGameValidator.VALIDATION_DATA_DIR)
+    parser.add_argument(
+        "--bundle", action="store_true", help="write the bundle if the data is valid"
+    )
+    parser.add_argument("--output", default=None, help="bundle file")
+    args = parser.parse_args(argv)
+
+    problems = check_data_dir(args.data_dir)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    blocking = errors(problems)
+    if problems:
+        print(
+            "%d errors, %d warnings"
+            % (len(blocking), len(problems) - len(blocking)),
+            file=sys.stderr,
+        )
+    if blocking:
+        return 1
+    if args.bundle:
+        from MMOGameValidator.bundle import build_bundle
+
+        print(build_bundle(args.data_dir, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
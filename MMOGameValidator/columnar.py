@@ -0,0 +1,153 @@
+"""Validate whole columns of characters at once.
+
+Datasets hold few distinct realms, so instead of normalizing row by row the
+game code, region, server and faction columns are factorized and every
+distinct combination is normalized once. Only the free text fields
+(``character_name`` and ``sorting_code``) are checked per row, against the
+rules of their row's combination.
+
+Columns may be lists, NumPy arrays or pandas Series. When any of them is
+array-like and NumPy is installed the results are NumPy arrays, otherwise
+they are lists.
+"""
+from __future__ import unicode_literals
+
+import MMOGameValidator
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+CHOICE_FIELDS = ("game_code", "region", "server", "faction")
+FREE_FIELDS = ("character_name", "sorting_code")
+
+
+class ColumnarResult(object):
+    """Normalized columns and, per field, a mask of the rows it failed."""
+
+    __slots__ = ["columns", "errors", "valid"]
+
+    def __init__(self, columns, errors, valid):
+        self.columns = columns
+        self.errors = errors
+        self.valid = valid
+
+    def __repr__(self):
+        return "ColumnarResult(rows=%d, columns=%r, invalid_rows=%d)" % (
+            len(self.valid),
+            sorted(self.columns),
+            len(self.valid) - sum(self.valid),
+        )
+
+
+def _to_list(column):
+    if hasattr(column, "tolist"):
+        column = column.tolist()
+    # anything but a string (None, NaN, ...) counts as missing
+    return [value if isinstance(value, str) else None for value in column]
+
+
+def _normalize_combination(combination):
+    character = {
+        field: value
+        for field, value in zip(CHOICE_FIELDS, combination)
+        if value is not None
+    }
+    character.setdefault("game_code", "")
+    try:
+        rules = MMOGameValidator.get_validation_rules(character)
+    except (KeyError, ValueError):
+        # an unknown game code, or a record missing from the game data
+        return combination, {"game_code"}, None
+    cleaned_data, errors = MMOGameValidator._clean_character(character, rules)
+    cleaned = tuple(cleaned_data[field] for field in CHOICE_FIELDS)
+    return cleaned, {field for field in CHOICE_FIELDS if field in errors}, rules
+
+
+def normalize_columns(columns):
+    """Normalize a mapping of column name to column of equal length.
+
+    Returns a ``ColumnarResult`` whose ``columns`` hold the input columns
+    with ``game_code``, ``region``, ``server``, ``faction``,
+    ``character_name`` and ``sorting_code`` normalized, whose ``errors``
+    map each of those fields to a boolean mask of the rows it is invalid in
+    and whose ``valid`` mask flags the rows without any error. Rows with an
+    unknown game code, or resolving to a region or server whose record is
+    missing from the game data, keep their input values and are flagged in
+    the ``game_code`` mask.
+    """
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("columns must all have the same length")
+    length = lengths.pop() if lengths else 0
+    as_arrays = numpy is not None and any(
+        hasattr(column, "__array__") for column in columns.values()
+    )
+    missing = [None] * length
+    values = {
+        field: _to_list(columns[field]) if field in columns else missing
+        for field in CHOICE_FIELDS + FREE_FIELDS
+    }
+
+    # factorize the combinations of choice fields
+    codes = []
+    combinations = {}
+    for combination in zip(*(values[field] for field in CHOICE_FIELDS)):
+        code = combinations.get(combination)
+        if code is None:
+            code = combinations[combination] = len(combinations)
+        codes.append(code)
+    results = [_normalize_combination(c) for c in combinations]
+
+    cleaned_columns = {}
+    errors = {}
+    for position, field in enumerate(CHOICE_FIELDS):
+        cleaned = [result[0][position] for result in results]
+        failed = [field in result[1] for result in results]
+        if as_arrays:
+            cleaned_columns[field] = numpy.array(cleaned, dtype=object)[codes]
+            errors[field] = numpy.array(failed, dtype=bool)[codes]
+        else:
+            cleaned_columns[field] = [cleaned[code] for code in codes]
+            errors[field] = [failed[code] for code in codes]
+
+    # the free fields of each row, normalized by the plan normalize_character
+    # runs on them
+    names = []
+    sorting_codes = []
+    failed_names = []
+    failed_sorting_codes = []
+    apply_field_plan = MMOGameValidator._apply_field_plan
+    for code, name, sorting_code in zip(
+        codes, values["character_name"], values["sorting_code"]
+    ):
+        rules = results[code][2]
+        data = {"character_name": name, "sorting_code": sorting_code}
+        row_errors = {}
+        if rules is not None:
+            apply_field_plan(rules._name_plan, data, row_errors)
+        names.append(data["character_name"])
+        sorting_codes.append(data["sorting_code"])
+        failed_names.append("character_name" in row_errors)
+        failed_sorting_codes.append("sorting_code" in row_errors)
+    cleaned = {"character_name": names, "sorting_code": sorting_codes}
+    failed = {
+        "character_name": failed_names,
+        "sorting_code": failed_sorting_codes,
+    }
+    for field in FREE_FIELDS:
+        if as_arrays:
+            cleaned_columns[field] = numpy.array(cleaned[field], dtype=object)
+            errors[field] = numpy.array(failed[field], dtype=bool)
+        else:
+            cleaned_columns[field] = cleaned[field]
+            errors[field] = failed[field]
+
+    if as_arrays:
+        valid = ~numpy.logical_or.reduce([errors[f] for f in errors])
+    else:
+        valid = [not any(row) for row in zip(*errors.values())]
+    for name, column in columns.items():
+        cleaned_columns.setdefault(name, column)
+    return ColumnarResult(cleaned_columns, errors, valid)
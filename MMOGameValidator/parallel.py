@@ -0,0 +1,117 @@
+from __future__ import unicode_literals
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import MMOGameValidator
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _init_worker(data_dir, data_path, cache_dir, game_codes):
+    # workers started with "spawn" do not inherit a patched data location
+    MMOGameValidator.VALIDATION_DATA_DIR = data_dir
+    MMOGameValidator.VALIDATION_DATA_PATH = data_path
+    MMOGameValidator.VALIDATION_CACHE_DIR = cache_dir
+    # broken data is reported per record by the tasks themselves
+    MMOGameValidator.preload(game_codes, trace_memory=False)
+
+
+def _normalize_chunk(characters):
+    return list(MMOGameValidator.normalize_characters(characters))
+
+
+def _format_chunk(characters):
+    return [MMOGameValidator.format_character(c) for c in characters]
+
+
+def _apply_chunk(function, items):
+    return [function(item) for item in items]
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelValidator(object):
+    """Spread validation over a pool of worker processes.
+
+    Input is cut into chunks of ``chunk_size`` characters, only a few chunks
+    per worker are in flight at any time and results are yielded in input
+    order, exactly as the serial functions would produce them. Every worker
+    warms its caches for ``game_codes`` (all shipped games by default) once
+    when it starts.
+    """
+
+    def __init__(self, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE, game_codes=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        if game_codes is None:
+            game_codes = MMOGameValidator.available_game_codes()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_worker,
+            initargs=(
+                MMOGameValidator.VALIDATION_DATA_DIR,
+                MMOGameValidator.VALIDATION_DATA_PATH,
+                MMOGameValidator.VALIDATION_CACHE_DIR,
+                game_codes,
+            ),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _map(self, function, characters, *args):
+        pending = deque()
+        max_pending = self.jobs * 2
+        for chunk in _chunked(characters, self.chunk_size):
+            pending.append(self._executor.submit(function, *(args + (chunk,))))
+            if len(pending) >= max_pending:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+    def normalize_characters(self, characters):
+        """Parallel equivalent of ``MMOGameValidator.normalize_characters``."""
+        return self._map(_normalize_chunk, characters)
+
+    def format_characters(self, characters):
+        """Yield ``format_character`` of every character, in input order."""
+        return self._map(_format_chunk, characters)
+
+    def map(self, function, items):
+        """Yield ``function(item)`` for every item, in input order.
+
+        ``function`` runs in the workers so it has to be picklable.
+        """
+        return self._map(_apply_chunk, items, function)
+
+
+def normalize_characters(characters, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    with ParallelValidator(jobs=jobs, chunk_size=chunk_size) as validator:
+        for result in validator.normalize_characters(characters):
+            yield result
+
+
+def format_characters(characters, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    with ParallelValidator(jobs=jobs, chunk_size=chunk_size) as validator:
+        for result in validator.format_characters(characters):
+            yield result
@@ -0,0 +1,176 @@
+"""Look servers up without validating a whole character.
+
+Every game gets a server index the first time it is searched, built from its
+region and server records. Server names and labels are kept casefolded in a
+sorted array so completing a prefix is a bisection, codes (``sub_isoids``
+such as ``MLH``) map back to their servers and a region and server pair is
+checked with two dict lookups, matched the way ``normalize_character``
+matches them.
+"""
+from __future__ import unicode_literals
+
+from bisect import bisect_left
+
+import MMOGameValidator
+
+# game code -> (compiled game, index), rebuilt once the game is recompiled
+_INDEXES = {}
+
+
+def _record_codes(record):
+    # a server record holds its own code, under sub_isoids when it has no
+    # sub_keys the codes would be of
+    codes = [record.get("isoid")]
+    if "sub_keys" not in record:
+        codes.append(record.get("sub_isoids"))
+    return [code.upper() for code in codes if code]
+
+
+class ServerIndex(object):
+    __slots__ = ["game_code", "_sorted", "_regions", "_servers", "_codes"]
+
+    def __init__(self, game):
+        self.game_code = game.game_code
+        database = game.database
+        # region -> its (name, label) server choices in every language
+        choices = {}
+        for language, _is_default_language, game_level in game.languages:
+            for region in dict.fromkeys(name for name, _label in game_level.choices):
+                key = "%s/%s" % (self.game_code, region)
+                # records missing from the data are reported by
+                # MMOGameValidator.check, their servers cannot be validated
+                if region and game._localized_key(key, language) in database:
+                    level = game.level(key, language)
+                    choices.setdefault(region, []).extend(level.choices)
+
+        entries = {}
+        codes = {}
+        self._servers = {}
+        for region, region_choices in choices.items():
+            region_choices = MMOGameValidator._compact_choices(region_choices)
+            self._servers[region] = MMOGameValidator._make_choice_index(
+                region_choices
+            )
+            for name, label in region_choices:
+                for text in (name, label):
+                    text = text.strip().casefold()
+                    if text:
+                        entries.setdefault(region, set()).add((text, (region, name)))
+            region_data = database["%s/%s" % (self.game_code, region)]
+            names = region_data.get("sub_keys", "").split("~")
+            region_codes = region_data.get("sub_isoids", "").split("~")
+            for name in set(name for name, _label in region_choices):
+                found = []
+                if len(region_codes) == len(names) and name in names:
+                    found.append(region_codes[names.index(name)].upper())
+                record = database.get("%s/%s/%s" % (self.game_code, region, name))
+                if record is not None:
+                    found += _record_codes(record)
+                for code in set(found):
+                    if code:
+                        codes.setdefault(code, []).append((region, name))
+        # None -> every server, region -> its servers; as the casefolded
+        # texts and, in the same order, the (text, (region, server)) entries
+        self._sorted = {}
+        everywhere = set()
+        for region, region_entries in entries.items():
+            everywhere.update(region_entries)
+            self._sorted[region] = self._sort(region_entries)
+        self._sorted[None] = self._sort(everywhere)
+        self._regions = game.region_index
+        self._codes = {code: tuple(sorted(found)) for code, found in codes.items()}
+
+    @staticmethod
+    def _sort(entries):
+        entries = tuple(sorted(entries))
+        return [text for text, _server in entries], entries
+
+    def __len__(self):
+        return len({server for _text, server in self._sorted[None][1]})
+
+    def __contains__(self, region_server):
+        return self.resolve(*region_server) is not None
+
+    def resolve(self, region, server):
+        """Return the ``(region, server)`` names matched or ``None``."""
+        region = MMOGameValidator._match_index(region, self._regions)
+        index = self._servers.get(region)
+        if index is None:
+            return None
+        server = MMOGameValidator._match_index(server, index)
+        if not server:
+            # a missing server, or the empty key of a trailing "~" in the data
+            return None
+        return region, server
+
+    def complete(self, prefix, region=None, limit=10):
+        """Return up to ``limit`` ``(region, server)`` pairs for ``prefix``.
+
+        A server is found when its name or label starts with ``prefix``
+        compared casefolded; pairs are ordered by the text that matched. With
+        a ``region`` only its servers are returned, with a ``limit`` of
+        ``None`` every match is.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        if region is not None:
+            region = MMOGameValidator._match_index(region, self._regions)
+            if region is None:
+                return []
+        keys, entries = self._sorted.get(region, ((), ()))
+        prefix = (prefix or "").strip().casefold()
+        position = bisect_left(keys, prefix)
+        found = []
+        seen = set()
+        while position < len(keys) and keys[position].startswith(prefix):
+            server = entries[position][1]
+            position += 1
+            if server not in seen:
+                seen.add(server)
+                found.append(server)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def find(self, code):
+        """Return the ``(region, server)`` pairs having ``code``."""
+        if not code:
+            return ()
+        return self._codes.get(code.strip().upper(), ())
+
+
+def get_server_index(game_code):
+    """Return the ``ServerIndex`` of ``game_code``, built on first use."""
+    game_code = game_code.upper()
+    game = MMOGameValidator._COMPILED_GAMES.get(game_code)
+    entry = _INDEXES.get(game_code)
+    if entry is not None and entry[0] is game:
+        return entry[1]
+    if game is None:
+        game = MMOGameValidator._get_compiled_game(game_code)
+    index = ServerIndex(game)
+    _INDEXES[game_code] = (game, index)
+    return index
+
+
+def complete_servers(game_code, prefix, region=None, limit=10):
+    """Return up to ``limit`` ``(region, server)`` pairs for ``prefix``."""
+    return get_server_index(game_code).complete(prefix, region=region, limit=limit)
+
+
+def find_servers(game_code, code):
+    """Return the ``(region, server)`` pairs of a server code."""
+    return get_server_index(game_code).find(code)
+
+
+def is_valid_server(game_code, region, server):
+    """Return whether ``server`` is a server of ``region`` in ``game_code``.
+
+    Region and server are matched the way ``normalize_character`` matches
+    them, an unknown game code has no valid servers.
+    """
+    try:
+        index = get_server_index(game_code)
+    except ValueError:
+        return False
+    return index.resolve(region, server) is not None
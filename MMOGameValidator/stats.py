@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import threading
+
+
+class ValidationStats(object):
+    """Per game code counters and stage timings of the validation hot path.
+
+    An instance is installed with ``MMOGameValidator.enable_stats()``; any
+    other object providing ``count``, ``timing`` and ``failure`` can be
+    installed instead to forward the measurements elsewhere.
+
+    Stages timed are ``load`` (reading and parsing a data file),
+    ``compile_game``, ``compile_rules``, ``match_choices`` and ``match_name``;
+    a ``compile_rules`` timing includes the load and game compilation that
+    happened during the same rules cache miss.
+    Counters are ``files_loaded``, ``regexes_compiled``, ``rules_cache_hits``
+    and ``rules_cache_misses``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._games = {}
+
+    def _game(self, game_code):
+        game = self._games.get(game_code)
+        if game is None:
+            game = self._games[game_code] = {
+                "counters": {},
+                "timings": {},
+                "failures": {},
+            }
+        return game
+
+    def count(self, game_code, name, value=1):
+        with self._lock:
+            counters = self._game(game_code)["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def timing(self, game_code, stage, seconds):
+        with self._lock:
+            timings = self._game(game_code)["timings"]
+            timing = timings.get(stage)
+            if timing is None:
+                timings[stage] = {"count": 1, "total": seconds, "max": seconds}
+            else:
+                timing["count"] += 1
+                timing["total"] += seconds
+                if seconds > timing["max"]:
+                    timing["max"] = seconds
+
+    def failure(self, game_code, field, error):
+        with self._lock:
+            failures = self._game(game_code)["failures"]
+            errors = failures.setdefault(field, {})
+            errors[error] = errors.get(error, 0) + 1
+
+    def snapshot(self):
+        """Return a copy of everything recorded, keyed by game code."""
+        with self._lock:
+            return {
+                game_code: {
+                    "counters": dict(game["counters"]),
+                    "timings": {
+                        stage: dict(timing)
+                        for stage, timing in game["timings"].items()
+                    },
+                    "failures": {
+                        field: dict(errors)
+                        for field, errors in game["failures"].items()
+                    },
+                }
+                for game_code, game in self._games.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._games.clear()
@@ -0,0 +1,107 @@
+"""Suggest the closest valid choices for a misspelled value.
+
+Every choice list gets a trigram index the first time it is searched. A
+lookup gathers candidates from the postings of the value's rarest trigrams
+and ranks only those by trigram similarity (the Dice coefficient), instead
+of computing an edit distance against every choice.
+"""
+from __future__ import unicode_literals
+
+import MMOGameValidator
+
+# candidates gathered before common trigrams stop being followed
+MAX_CANDIDATES = 256
+MAX_INDEXES = 4096
+
+# id(choices) -> (choices, index), the list is kept to detect id reuse
+_INDEXES = {}
+
+
+def _trigrams(text):
+    text = "  %s " % (text,)
+    return frozenset(text[i : i + 3] for i in range(len(text) - 2))
+
+
+class SuggestionIndex(object):
+    __slots__ = ["_terms", "_postings"]
+
+    def __init__(self, choices):
+        # (lowercased name or label, its trigrams, name)
+        self._terms = []
+        seen = set()
+        for name, label in choices:
+            for text in (name, label):
+                text = text.strip().lower()
+                if text and (text, name) not in seen:
+                    seen.add((text, name))
+                    self._terms.append((text, _trigrams(text), name))
+        self._postings = {}
+        for position, (_text, trigrams, _name) in enumerate(self._terms):
+            for trigram in trigrams:
+                self._postings.setdefault(trigram, []).append(position)
+
+    def suggest(self, value, limit=3, cutoff=0.5):
+        """Return up to ``limit`` choice names closest to ``value``.
+
+        Names are ordered from the closest match, those whose similarity is
+        below ``cutoff`` (between 0 and 1) are left out.
+        """
+        if not value:
+            return []
+        value = value.strip().lower()
+        trigrams = _trigrams(value)
+        postings = sorted(
+            (self._postings[t] for t in trigrams if t in self._postings), key=len
+        )
+        candidates = set()
+        for posting in postings:
+            if candidates and len(candidates) + len(posting) > MAX_CANDIDATES:
+                break
+            candidates.update(posting)
+        scored = []
+        for position in candidates:
+            text, text_trigrams, name = self._terms[position]
+            shared = len(trigrams & text_trigrams)
+            similarity = 2.0 * shared / (len(trigrams) + len(text_trigrams))
+            if similarity >= cutoff:
+                scored.append((-similarity, abs(len(text) - len(value)), text, name))
+        names = []
+        for _similarity, _length, _text, name in sorted(scored):
+            if name not in names:
+                names.append(name)
+                if len(names) == limit:
+                    break
+        return names
+
+
+def get_suggestion_index(choices):
+    entry = _INDEXES.get(id(choices))
+    if entry is not None and entry[0] is choices:
+        return entry[1]
+    if len(_INDEXES) >= MAX_INDEXES:
+        _INDEXES.clear()
+    index = SuggestionIndex(choices)
+    _INDEXES[id(choices)] = (choices, index)
+    return index
+
+
+def suggest(value, choices, limit=3, cutoff=0.5):
+    """Return up to ``limit`` names from ``(name, label)`` ``choices``."""
+    return get_suggestion_index(choices).suggest(value, limit=limit, cutoff=cutoff)
+
+
+def get_suggestions(character, errors, limit=3):
+    """Suggest choices for every field of ``character`` reported invalid."""
+    rules = MMOGameValidator.get_validation_rules(character)
+    fields = {
+        "region": rules.region_choices,
+        "server": rules.server_choices,
+        "faction": rules.faction_choices,
+    }
+    suggestions = {}
+    for field, choices in fields.items():
+        if errors.get(field) == "invalid" and choices:
+            names = suggest(character.get(field), choices, limit=limit)
+            if names:
+                suggestions[field] = names
+    return suggestions
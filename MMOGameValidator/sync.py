@@ -0,0 +1,213 @@
+"""Keep a local copy of the game data in sync with an HTTP endpoint.
+
+    sync = DataSync("https://example.com/data/%s.json", "/var/cache/mmogv")
+    sync.activate()
+    sync.start(interval=300)
+
+Every game file is fetched with the ``ETag`` and ``Last-Modified`` of the
+copy already cached, so an unchanged game costs a ``304 Not Modified``
+response. Games are fetched concurrently over a single pooled session and
+written to the cache directory atomically; once the directory is activated
+the validator reads every game found there instead of the packaged one.
+
+Requires ``requests``, installed with ``pip install MMOGameValidator[sync]``.
+"""
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import MMOGameValidator
+
+# validator headers of a cached game, stored next to it
+META_SUFFIX = ".meta"
+
+logger = logging.getLogger(__name__)
+
+
+def _write_atomically(path, data):
+    directory = os.path.dirname(path)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=directory, prefix=".%s." % os.path.basename(path)
+    )
+    try:
+        with io.open(descriptor, "wb") as output:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class DataSync(object):
+    """Fetch game data files from ``url`` into ``cache_dir``.
+
+    ``url`` contains ``%s`` for the lowercase game code. ``game_codes``
+    defaults to the ``zz`` defaults and every game the validator knows
+    about. At most ``max_workers`` requests run at once.
+    """
+
+    def __init__(
+        self,
+        url,
+        cache_dir,
+        game_codes=None,
+        max_workers=8,
+        timeout=10.0,
+        session=None,
+    ):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.game_codes = game_codes
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._session = session
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                try:
+                    import requests
+                except ImportError:
+                    raise ImportError(
+                        "DataSync requires requests, "
+                        "install MMOGameValidator[sync]"
+                    )
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.max_workers
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _path(self, game_code):
+        return os.path.join(self.cache_dir, "%s.json" % game_code)
+
+    def _read_meta(self, game_code):
+        path = self._path(game_code)
+        if not os.path.exists(path):
+            # no point revalidating headers of a file that is gone
+            return {}
+        try:
+            with io.open(path + META_SUFFIX, encoding="utf-8") as meta:
+                return json.load(meta)
+        except (OSError, ValueError):
+            return {}
+
+    def fetch(self, game_code):
+        """Fetch one game, return whether its cached copy was replaced."""
+        game_code = game_code.lower()
+        meta = self._read_meta(game_code)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        response = self.session.get(
+            self.url % (game_code,), headers=headers, timeout=self.timeout
+        )
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        data = response.content
+        database = json.loads(data.decode("utf-8"))
+        if not isinstance(database, dict) or game_code.upper() not in database:
+            raise ValueError("%r is not the data of game %r" % (self.url, game_code))
+        _write_atomically(self._path(game_code), data)
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        _write_atomically(
+            self._path(game_code) + META_SUFFIX, json.dumps(meta).encode("utf-8")
+        )
+        return True
+
+    def sync(self, game_codes=None):
+        """Fetch every game concurrently and reload the ones that changed.
+
+        Returns a report with the games ``updated``, the ones ``unchanged``
+        and the ones that ``failed`` with their error; a failed game keeps
+        its cached copy.
+        """
+        if game_codes is None:
+            game_codes = self.game_codes
+        if game_codes is None:
+            game_codes = ["zz"] + MMOGameValidator.available_game_codes()
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        report = {"updated": [], "unchanged": [], "failed": {}}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                (game_code, executor.submit(self.fetch, game_code))
+                for game_code in game_codes
+            ]
+            for game_code, future in futures:
+                try:
+                    updated = future.result()
+                except Exception as e:
+                    report["failed"][game_code] = repr(e)
+                    continue
+                report["updated" if updated else "unchanged"].append(game_code)
+        if report["updated"] and self.is_active():
+            MMOGameValidator.reload_changed()
+        return report
+
+    def is_active(self):
+        return MMOGameValidator.VALIDATION_CACHE_DIR == self.cache_dir
+
+    def activate(self):
+        """Make the validator read games from the cache directory."""
+        MMOGameValidator.VALIDATION_CACHE_DIR = self.cache_dir
+        MMOGameValidator.reload_changed()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self, interval=300.0, jitter=0.1):
+        """Sync every ``interval`` seconds in a background thread.
+
+        Each wait is randomly lengthened or shortened by up to ``jitter``
+        times the interval so many nodes do not hit the origin at once.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(interval, jitter), name="MMOGameValidator-sync"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval, jitter):
+        while not self._stopped.wait(
+            interval * (1 + random.uniform(-jitter, jitter))
+        ):
+            try:
+                self.sync()
+            except Exception:
+                # retried at the next interval
+                logger.exception("syncing the game data failed")
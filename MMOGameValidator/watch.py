@@ -0,0 +1,55 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+import MMOGameValidator
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher(object):
+    """Poll the game data in a background thread and hot-reload changes.
+
+    Every ``interval`` seconds ``MMOGameValidator.reload_changed()`` is
+    called and ``callback``, if given, receives the non-empty list of game
+    codes it reloaded.
+    """
+
+    def __init__(self, interval=5.0, callback=None):
+        self.interval = interval
+        self.callback = callback
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="MMOGameValidator-watch"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                reloaded = MMOGameValidator.reload_changed()
+                if reloaded and self.callback is not None:
+                    self.callback(reloaded)
+            except Exception:
+                # a bad file or callback must not stop the polling for good
+                logger.exception("reloading the game data failed")
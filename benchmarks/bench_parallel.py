@@ -0,0 +1,78 @@
+"""Measure how ParallelValidator scales with the number of workers.
+
+    python benchmarks/bench_parallel.py --records 200000 --chunk-size 2000
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import MMOGameValidator  # noqa: E402
+from MMOGameValidator.parallel import ParallelValidator  # noqa: E402
+
+SAMPLES = [
+    {
+        "game_code": "wcw",
+        "region": "na",
+        "server": "maladath",
+        "faction": "Horde",
+        "character_name": "hello",
+    },
+    {
+        "game_code": "WCW",
+        "region": "Europe",
+        "server": "nope",
+        "faction": "alliance",
+        "character_name": "world",
+    },
+    {
+        "game_code": "nw",
+        "region": "US West",
+        "server": "el dorado",
+        "character_name": "someone",
+    },
+    {"game_code": "xx"},
+]
+
+
+def make_records(count):
+    return list(itertools.islice(itertools.cycle(SAMPLES), count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    records = make_records(args.records)
+    start = time.perf_counter()
+    expected = list(MMOGameValidator.normalize_characters(records))
+    serial = time.perf_counter() - start
+    print("serial: %.0f records/s" % (args.records / serial))
+
+    for jobs in range(1, args.max_jobs + 1):
+        with ParallelValidator(jobs=jobs, chunk_size=args.chunk_size) as validator:
+            # start the workers before timing
+            list(validator.normalize_characters(records[: jobs * 2]))
+            start = time.perf_counter()
+            results = list(validator.normalize_characters(records))
+            elapsed = time.perf_counter() - start
+        if results != expected:
+            print("jobs=%d: results differ from the serial run" % jobs)
+            return 1
+        print(
+            "jobs=%d: %.0f records/s, %.2fx serial"
+            % (jobs, args.records / elapsed, serial / elapsed)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Sync synthetic games from a local stand-in for the data endpoint.
+
+    python benchmarks/bench_sync.py --games 50
+
+Serves a directory of game files over HTTP with ``ETag`` and
+``Last-Modified`` support, then times a cold sync, a sync where nothing
+changed and one after a single game changed, reporting how many files each
+of them downloaded. Needs the ``sync`` extra (requests).
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import email.utils
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+sys.path.insert(0, HERE)
+
+import MMOGameValidator  # noqa: E402
+import synthetic  # noqa: E402
+from MMOGameValidator.sync import DataSync  # noqa: E402
+
+
+class ConditionalHandler(SimpleHTTPRequestHandler):
+    # keep connections alive so the client's pool is exercised
+    protocol_version = "HTTP/1.1"
+    downloads = 0
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        try:
+            with open(path, "rb") as data:
+                content = data.read()
+        except OSError:
+            self.send_error(404)
+            return None
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()
+        last_modified = email.utils.formatdate(os.stat(path).st_mtime, usegmt=True)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        ConditionalHandler.downloads += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        return _Body(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Body(object):
+    def __init__(self, content):
+        self.content = content
+
+    def read(self, *args):
+        content, self.content = self.content, b""
+        return content
+
+    def close(self):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops concurrent connections
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def serve(directory):
+    handler = type(
+        str("Handler"),
+        (ConditionalHandler,),
+        {"__init__": _handler_init(directory)},
+    )
+    server = _Server(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def _handler_init(directory):
+    def __init__(self, *args, **kwargs):
+        SimpleHTTPRequestHandler.__init__(self, *args, directory=directory, **kwargs)
+
+    return __init__
+
+
+def _timed_sync(label, sync):
+    ConditionalHandler.downloads = 0
+    start = time.perf_counter()
+    report = sync.sync()
+    elapsed = time.perf_counter() - start
+    print(
+        "%-10s %7.3fs  downloaded %3d  updated %3d  unchanged %3d  failed %d"
+        % (
+            label,
+            elapsed,
+            ConditionalHandler.downloads,
+            len(report["updated"]),
+            len(report["unchanged"]),
+            len(report["failed"]),
+        )
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--servers", type=int, default=200, help="per region")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        print(
+            "bench_sync needs requests, install MMOGameValidator[sync]",
+            file=sys.stderr,
+        )
+        return 2
+
+    origin = tempfile.mkdtemp(prefix="mmogv-origin-")
+    cache_dir = tempfile.mkdtemp(prefix="mmogv-cache-")
+    try:
+        game_codes = ["g%02d" % i for i in range(args.games)]
+        synthetic.make_data_dir(
+            origin,
+            {
+                game_code: synthetic.make_game(game_code, servers=args.servers)
+                for game_code in game_codes
+            },
+        )
+        server = serve(origin)
+        url = "http://127.0.0.1:%d/%%s.json" % server.server_address[1]
+        sync = DataSync(
+            url,
+            cache_dir,
+            game_codes=["zz"] + game_codes,
+            max_workers=args.workers,
+        )
+        sync.activate()
+        _timed_sync("cold", sync)
+        _timed_sync("unchanged", sync)
+
+        character = {"game_code": game_codes[0], "region": "r0"}
+        rules = MMOGameValidator.get_validation_rules(character)
+        assert len(rules.server_choices) == args.servers
+        # a realm launch
+        database = synthetic.make_game(game_codes[0], servers=args.servers + 1)
+        synthetic.make_data_dir(origin, {game_codes[0]: database})
+        report = _timed_sync("one", sync)
+        assert report["updated"] == [game_codes[0]], report
+        rules = MMOGameValidator.get_validation_rules(character)
+        assert len(rules.server_choices) == args.servers + 1
+        server.shutdown()
+    finally:
+        shutil.rmtree(origin)
+        shutil.rmtree(cache_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Stress the shared caches from many threads and measure throughput.
+
+    python benchmarks/bench_threads.py --max-threads 16 --seconds 1
+
+First starts every thread at once on cold caches and checks each file was
+parsed and each game compiled a single time and that every thread got the
+same compiled game. Then measures ``validate_character`` throughput per
+thread count on warm caches, with one more thread recompiling the games all
+along, and checks every result against the serial one. Throughput only
+grows with the thread count on a free-threaded build of CPython; with the
+GIL it shows what contention costs.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import MMOGameValidator  # noqa: E402
+from bench_parallel import SAMPLES  # noqa: E402
+
+GAME_CODES = ["LA", "NW", "WCW"]
+
+
+def _run_threads(count, target):
+    barrier = threading.Barrier(count)
+    failures = []
+
+    def run(position):
+        barrier.wait()
+        try:
+            target(position)
+        except Exception as e:  # reported, the other threads keep going
+            failures.append(repr(e))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures
+
+
+def check_cold_start(threads):
+    MMOGameValidator.clear_cache()
+    stats = MMOGameValidator.enable_stats()
+    games = [None] * threads
+
+    def load(position):
+        game_code = GAME_CODES[position % len(GAME_CODES)]
+        MMOGameValidator.get_validation_rules({"game_code": game_code})
+        games[position] = MMOGameValidator._COMPILED_GAMES[game_code]
+
+    failures = _run_threads(threads, load)
+    MMOGameValidator.disable_stats()
+    snapshot = stats.snapshot()
+    for game_code in ["ZZ"] + GAME_CODES:
+        counters = snapshot.get(game_code, {}).get("counters", {})
+        if counters.get("files_loaded") != 1:
+            failures.append(
+                "%s parsed %s times" % (game_code, counters.get("files_loaded"))
+            )
+    for game_code in GAME_CODES:
+        compiled = snapshot[game_code]["timings"]["compile_game"]["count"]
+        if compiled != 1:
+            failures.append("%s compiled %d times" % (game_code, compiled))
+    for position, game in enumerate(games):
+        game_code = GAME_CODES[position % len(GAME_CODES)]
+        if game is not games[GAME_CODES.index(game_code)]:
+            failures.append("thread %d got another %s" % (position, game_code))
+    return failures
+
+
+def _expected(characters):
+    return [
+        MMOGameValidator.validate_character(character) for character in characters
+    ]
+
+
+def measure(threads, seconds, characters, expected, churn):
+    counts = [0] * threads
+    stopped = threading.Event()
+
+    def validate(position):
+        # every thread starts at another character
+        shift = position % len(characters)
+        order = list(range(len(characters)))[shift:] + list(range(shift))
+        count = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for i in order:
+                result = MMOGameValidator.validate_character(characters[i])
+                if (result.cleaned_data, dict(result.errors)) != expected[i]:
+                    raise AssertionError(
+                        "%r validated as %r" % (characters[i], result)
+                    )
+            count += len(order)
+        counts[position] = count
+
+    def recompile():
+        for game_code in itertools.cycle(GAME_CODES):
+            if stopped.is_set():
+                return
+            MMOGameValidator._recompile_game(game_code)
+            time.sleep(0.001)
+
+    reloader = None
+    if churn:
+        reloader = threading.Thread(target=recompile)
+        reloader.start()
+    start = time.perf_counter()
+    failures = _run_threads(threads, validate)
+    elapsed = time.perf_counter() - start
+    stopped.set()
+    if reloader is not None:
+        reloader.join()
+    return sum(counts) / elapsed, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument(
+        "--no-churn", action="store_true", help="do not recompile games meanwhile"
+    )
+    args = parser.parse_args(argv)
+
+    failures = check_cold_start(args.max_threads)
+    print(
+        "cold start, %d threads: %s"
+        % (args.max_threads, "; ".join(failures) or "ok")
+    )
+
+    characters = SAMPLES + [
+        {"game_code": "la", "character_name": "someone"},
+        {"game_code": "wcw", "region": "eu", "server": "Ravencrest"},
+    ]
+    expected = [
+        (result.cleaned_data, dict(result.errors))
+        for result in _expected(characters)
+    ]
+    baseline = None
+    threads = 1
+    while threads <= args.max_threads:
+        rate, thread_failures = measure(
+            threads, args.seconds, characters, expected, not args.no_churn
+        )
+        if baseline is None:
+            baseline = rate
+        print(
+            "threads=%2d: %9.0f validations/s, %.2fx one thread%s"
+            % (
+                threads,
+                rate,
+                rate / baseline,
+                "  FAILED %s" % thread_failures[0] if thread_failures else "",
+            )
+        )
+        failures.extend(thread_failures)
+        threads *= 2
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
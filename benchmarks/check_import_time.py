@@ -0,0 +1,96 @@
+"""Fail when importing MMOGameValidator got slower or heavier.
+
+    python benchmarks/check_import_time.py --budget-ms 10
+
+Imports the package in fresh interpreters under ``python -X importtime`` and
+exits non-zero when the best cumulative import time of the package exceeds
+the budget or when the import pulled in a module that is only meant to be
+loaded on first use.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import compileall
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, os.pardir)
+PACKAGE = "MMOGameValidator"
+
+# loaded lazily by the functions needing them
+LAZY_MODULES = [
+    "copy",
+    "glob",
+    "json",
+    "re",
+    "requests",
+    "tracemalloc",
+    "MMOGameValidator.bundle",
+    "MMOGameValidator.servers",
+    "MMOGameValidator.stats",
+    "MMOGameValidator.suggest",
+]
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_time():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # time the import, not the compilation of the sources
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % PACKAGE],
+        env=env,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stderr
+    cumulative = None
+    modules = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        modules.append(match.group(4))
+        if match.group(4) == PACKAGE:
+            cumulative = int(match.group(2))
+    return cumulative, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=10.0,
+        help="most the package import may take, in milliseconds",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    compileall.compile_dir(os.path.join(ROOT, PACKAGE), quiet=1)
+    timings = []
+    modules = set()
+    for _i in range(args.repeat):
+        cumulative, imported = _import_time()
+        timings.append(cumulative)
+        modules.update(imported)
+    best = min(timings) / 1000.0
+    print("import %s: %.2f ms (budget %.2f ms)" % (PACKAGE, best, args.budget_ms))
+
+    failures = []
+    if best > args.budget_ms:
+        failures.append("import took %.2f ms" % best)
+    for module in LAZY_MODULES:
+        if module in modules:
+            failures.append("import loaded %s" % module)
+    for failure in failures:
+        print("FAIL %s" % failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Benchmark the cold start, warm paths and bulk throughput of the validator.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json --tolerance 0.25
+
+Results are written as JSON mapping each benchmark name to its value, unit
+and whether lower or higher is better. With ``--compare`` every benchmark
+that got worse than the baseline by more than the tolerance is reported and
+the exit status is non-zero.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+sys.path.insert(0, HERE)
+
+import MMOGameValidator  # noqa: E402
+import synthetic  # noqa: E402
+from MMOGameValidator import servers  # noqa: E402
+from MMOGameValidator.suggest import suggest  # noqa: E402
+
+CHARACTER = {
+    "game_code": "wcw",
+    "region": "na",
+    "server": "maladath",
+    "faction": "Horde",
+    "character_name": "hello",
+}
+
+
+class Results(object):
+    def __init__(self):
+        self.results = {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.results[name] = {"value": value, "unit": unit, "better": better}
+        print("%-45s %14.3f %s" % (name, value, unit), file=sys.stderr)
+
+
+def _per_call(statement, number, repeat=5):
+    # best of several runs, in microseconds per call
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_import(results, repeat):
+    code = "import time; s = time.perf_counter(); import MMOGameValidator; " \
+        "print(time.perf_counter() - s)"
+    env = dict(os.environ, PYTHONPATH=os.path.join(HERE, os.pardir))
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", code], env=env))
+        for _i in range(repeat)
+    ]
+    results.add("import", min(timings) * 1e3, "ms")
+
+
+def bench_first_call(results, data_dir, label):
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.json"))):
+        game_code = os.path.splitext(os.path.basename(path))[0]
+        if game_code == "zz":
+            continue
+
+        def first_call():
+            MMOGameValidator.clear_cache()
+            try:
+                MMOGameValidator.get_validation_rules({"game_code": game_code})
+            except (KeyError, ValueError):
+                pass
+
+        results.add(
+            "first_call.%s.%s" % (label, game_code), _per_call(first_call, 5), "us"
+        )
+
+
+def bench_warm(results, number):
+    character = dict(CHARACTER)
+    normalized = MMOGameValidator.normalize_character(character)
+    get_rules = MMOGameValidator.get_validation_rules
+    operations = {
+        "get_validation_rules": lambda: get_rules(character),
+        "normalize_character": lambda: MMOGameValidator.normalize_character(
+            character
+        ),
+        "validate_character": lambda: MMOGameValidator.validate_character(
+            character
+        ),
+        "format_character": lambda: MMOGameValidator.format_character(normalized),
+        "latinize_character": lambda: MMOGameValidator.latinize_character(
+            normalized, normalized=True
+        ),
+    }
+    for name, operation in operations.items():
+        operation()
+        results.add("warm.%s" % name, _per_call(operation, number), "us")
+
+
+def _normalize(character):
+    try:
+        return MMOGameValidator.normalize_character(character)
+    except MMOGameValidator.InvalidCharacter as e:
+        return e.errors
+
+
+def bench_allocations(results, number=1000):
+    invalid = dict(CHARACTER, server="no such server")
+    operations = {
+        "normalize_character.valid": lambda: _normalize(CHARACTER),
+        "normalize_character.invalid": lambda: _normalize(invalid),
+        "validate_character.valid": lambda: MMOGameValidator.validate_character(
+            CHARACTER
+        ),
+        "validate_character.invalid": lambda: MMOGameValidator.validate_character(
+            invalid
+        ),
+    }
+    for name, operation in operations.items():
+        operation()
+        tracemalloc.start()
+        try:
+            # the most allocated at once by a single call
+            operation()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation()
+            peak = tracemalloc.get_traced_memory()[1] - before
+            # and what the calls' results keep allocated
+            kept = [None] * number
+            before = tracemalloc.get_traced_memory()[0]
+            for i in range(number):
+                kept[i] = operation()
+            retained = (tracemalloc.get_traced_memory()[0] - before) / number
+        finally:
+            tracemalloc.stop()
+        results.add("alloc.%s.peak" % name, peak, "B")
+        results.add("alloc.%s.retained" % name, retained, "B")
+
+
+def bench_match_choices(results, sizes):
+    for size in sizes:
+        choices = [("Server %d" % i, "Label %d" % i) for i in range(size)]
+        index = MMOGameValidator._make_choice_index(choices)
+        # the last label is the worst case for a linear scan
+        value = "label %d" % (size - 1)
+        number = max(10, 100000 // size)
+        results.add(
+            "match_choices.linear.%d" % size,
+            _per_call(lambda: MMOGameValidator._match_choices(value, choices), number),
+            "us",
+        )
+        results.add(
+            "match_choices.index.%d" % size,
+            _per_call(lambda: MMOGameValidator._match_index(value, index), 100000),
+            "us",
+        )
+        # a typo in the middle of the last label
+        typo = value[:3] + value[4:]
+        suggest(typo, choices)
+        results.add(
+            "suggest.%d" % size, _per_call(lambda: suggest(typo, choices), 200), "us"
+        )
+
+
+def bench_servers(results, label, game_code, region, server, prefix, number):
+    operations = {
+        "complete": lambda: servers.complete_servers(game_code, prefix),
+        "find": lambda: servers.find_servers(game_code, server[:3]),
+        "is_valid": lambda: servers.is_valid_server(game_code, region, server),
+    }
+    for name, operation in operations.items():
+        operation()
+        results.add(
+            "servers.%s.%s" % (name, label), _per_call(operation, number), "us"
+        )
+
+
+def bench_bulk(results, database, records):
+    characters = list(synthetic.make_characters(database, records))
+    elapsed = min(
+        timeit.repeat(
+            lambda: sum(1 for _r in MMOGameValidator.normalize_characters(characters)),
+            number=1,
+            repeat=3,
+        )
+    )
+    results.add("bulk.normalize_characters", records / elapsed, "records/s", "higher")
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous or not previous["value"]:
+            continue
+        ratio = result["value"] / previous["value"]
+        if result["better"] == "higher":
+            ratio = 1 / ratio if ratio else float("inf")
+        if ratio > 1 + tolerance:
+            regressions.append(
+                "%s: %.3f -> %.3f %s (%.0f%% worse)"
+                % (
+                    name,
+                    previous["value"],
+                    result["value"],
+                    result["unit"],
+                    (ratio - 1) * 100,
+                )
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="saved results")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--servers", type=int, default=2000, help="per region")
+    parser.add_argument("--regions", type=int, default=5)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument(
+        "--choices", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    args = parser.parse_args(argv)
+
+    results = Results()
+    bench_import(results, repeat=5)
+    bench_first_call(results, MMOGameValidator.VALIDATION_DATA_DIR, "shipped")
+    bench_warm(results, args.number)
+    bench_allocations(results)
+    bench_match_choices(results, args.choices)
+    bench_servers(results, "shipped", "WCW", "na", "Maladath", "ma", args.number)
+
+    database = synthetic.make_game("SYN", regions=args.regions, servers=args.servers)
+    data_dir = tempfile.mkdtemp(prefix="mmogv-bench-")
+    synthetic.make_data_dir(data_dir, {"SYN": database})
+    MMOGameValidator.VALIDATION_DATA_DIR = data_dir
+    MMOGameValidator.VALIDATION_DATA_PATH = os.path.join(data_dir, "%s.json")
+    MMOGameValidator.clear_cache()
+    bench_first_call(results, data_dir, "synthetic")
+    bench_servers(
+        results, "synthetic", "SYN", "R1", "Server R1 1999", "server r1 19", args.number
+    )
+    bench_bulk(results, database, args.records)
+
+    if args.output:
+        with io.open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results.results, output, indent=2, sort_keys=True)
+    if args.compare:
+        with io.open(args.compare, encoding="utf-8") as saved:
+            regressions = compare(results.results, json.load(saved), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION %s" % regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
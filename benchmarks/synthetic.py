@@ -0,0 +1,86 @@
+"""Generate synthetic game data files of arbitrary size."""
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import shutil
+
+import MMOGameValidator
+
+
+def make_game(game_code, regions=3, servers=18, factions=2):
+    """Return a game database shaped like the shipped ones.
+
+    The game has ``regions`` regions of ``servers`` servers each, named
+    ``R<n>`` and ``Server <region> <n>``.
+    """
+    game_code = game_code.upper()
+    region_keys = ["R%d" % r for r in range(regions)]
+    faction_keys = ["faction%d" % f for f in range(factions)]
+    database = {
+        game_code: {
+            "fmt": "%n%Z%n%A%n%n%C-%S",
+            "id": "data/%s" % game_code,
+            "key": game_code,
+            "lang": "en",
+            "languages": "en",
+            "name": "Synthetic %s" % game_code,
+            "require": "ASCZ" if factions else "SCZ",
+            "region_name_type": "region",
+            "sub_keys": "~".join(region_keys),
+            "sub_names": "~".join("Region %s" % key for key in region_keys),
+            "upper": "CS",
+        }
+    }
+    if factions:
+        database[game_code]["game_faction_type"] = "faction"
+        database[game_code]["faction_keys"] = "~".join(faction_keys)
+        database[game_code]["faction_names"] = "~".join(faction_keys)
+    for region in region_keys:
+        server_keys = ["Server %s %d" % (region, s) for s in range(servers)]
+        database["%s/%s" % (game_code, region)] = {
+            "id": "data/%s/%s" % (game_code, region),
+            "key": region,
+            "lang": "en",
+            "name": "Region %s" % region,
+            "sub_keys": "~".join(server_keys),
+        }
+        for server in server_keys:
+            key = "%s/%s/%s" % (game_code, region, server)
+            database[key] = {
+                "id": "data/%s" % key,
+                "key": server,
+                "lang": "en",
+                "sub_isoids": server.replace(" ", "")[:3].upper(),
+            }
+    return database
+
+
+def make_data_dir(path, games):
+    """Write ``{game_code: database}`` and the shipped defaults to ``path``."""
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    shutil.copy(os.path.join(MMOGameValidator.VALIDATION_DATA_DIR, "zz.json"), path)
+    for game_code, database in games.items():
+        filename = os.path.join(path, "%s.json" % game_code.lower())
+        with io.open(filename, "w", encoding="utf-8") as data:
+            json.dump(database, data, ensure_ascii=False)
+    return path
+
+
+def make_characters(database, count, invalid_every=10):
+    """Yield ``count`` characters for ``database``, some of them invalid."""
+    game_code = [key for key in database if "/" not in key][0]
+    servers = [key.split("/") for key in database if key.count("/") == 2]
+    factions = database[game_code].get("faction_keys", "").split("~")
+    for i in range(count):
+        _game, region, server = servers[i % len(servers)]
+        character = {
+            "game_code": game_code.lower(),
+            "region": region.lower(),
+            "server": server if i % invalid_every else server + "x",
+            "faction": factions[i % len(factions)],
+            "character_name": "name%d" % i,
+        }
+        yield character
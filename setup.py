@@ -1,6 +1,8 @@
 #! /usr/bin/env python
 import io
+import os
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 
 
@@ -14,6 +16,39 @@ def get_long_description():
     )  #  noqa
 
 
+class BuildPyWithBundle(build_py):
+    """Ship the game data precompiled into a single bundle.
+
+    The bundle is only written when ``MMOGameValidator.check`` finds no
+    error in the data; otherwise the package reads the JSON files.
+    """
+
+    def run(self):
+        build_py.run(self)
+        if self.dry_run:
+            return
+        from MMOGameValidator import BUNDLE_FILENAME
+        from MMOGameValidator.bundle import build_bundle
+        from MMOGameValidator.check import check_data_dir, errors
+
+        data_dir = os.path.join(self.build_lib, "MMOGameValidator", "data")
+        problems = check_data_dir(data_dir)
+        for problem in problems:
+            self.warn(str(problem))
+        blocking = errors(problems)
+        if blocking:
+            self.warn(
+                "%d errors in the game data, not writing the bundle"
+                % len(blocking)
+            )
+            # a bundle left by an earlier build would be out of date
+            bundle_path = os.path.join(data_dir, BUNDLE_FILENAME)
+            if os.path.exists(bundle_path):
+                os.remove(bundle_path)
+            return
+        build_bundle(data_dir)
+
+
 setup(
     name="MMOGameValidator",
     long_description=get_long_description(),
@@ -25,9 +60,11 @@ setup(
     url="https://github.com/Qasem-h/mmo-game-validator",
     packages=find_packages(exclude=["tests"]),
     include_package_data=True,
-    install_requires=["requests>=2.7.0"],
+    install_requires=[],
+    extras_require={"sync": ["requests>=2.7.0"]},
     tests_require=["mock", "pytest-cov", "pytest"],
     zip_safe=False,
+    cmdclass={"build_py": BuildPyWithBundle},
     classifiers=[
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
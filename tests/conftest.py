@@ -0,0 +1,69 @@
+from __future__ import unicode_literals
+
+import glob
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+import MMOGameValidator
+
+PACKAGE_DATA_DIR = MMOGameValidator.VALIDATION_DATA_DIR
+
+
+def _bump_mtime(path, after=None):
+    # a second past the modification time of after (or path), distinct
+    # however coarse the file system's resolution
+    mtime = os.stat(after or path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def bump_mtime():
+    """Move the modification time of ``path`` a second past ``after``'s."""
+    return _bump_mtime
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A copy of the shipped data, used instead of it with empty caches."""
+    for path in glob.glob(os.path.join(PACKAGE_DATA_DIR, "*.json")):
+        shutil.copy(path, str(tmp_path))
+    monkeypatch.setattr(MMOGameValidator, "VALIDATION_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        MMOGameValidator,
+        "VALIDATION_DATA_PATH",
+        os.path.join(str(tmp_path), "%s.json"),
+    )
+    monkeypatch.setattr(MMOGameValidator, "VALIDATION_CACHE_DIR", None)
+    MMOGameValidator.clear_cache()
+    yield tmp_path
+    MMOGameValidator.clear_cache()
+
+
+@pytest.fixture
+def rewrite(data_dir):
+    """Rewrite a game file of ``data_dir`` with a newer modification time.
+
+    Called with the game code and either ``update``, a function changing the
+    parsed database in place, or the raw ``text`` to write.
+    """
+
+    def rewrite(game_code, update=None, text=None):
+        path = os.path.join(str(data_dir), "%s.json" % game_code)
+        if text is None:
+            with io.open(path, encoding="utf-8") as data:
+                database = json.load(data)
+            update(database)
+            text = json.dumps(database)
+        mtime = os.stat(path).st_mtime_ns
+        with io.open(path, "w", encoding="utf-8") as data:
+            data.write(text)
+        os.utime(path, ns=(mtime, mtime))
+        _bump_mtime(path)
+        return path
+
+    return rewrite
+
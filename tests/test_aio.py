@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+
+import pytest
+
+import MMOGameValidator
+from MMOGameValidator import InvalidCharacter
+from MMOGameValidator.aio import (
+    aformat_character,
+    aget_validation_rules,
+    anormalize_character,
+)
+
+CHARACTER = {
+    "game_code": "wcw",
+    "region": "na",
+    "server": "pagle",
+    "faction": "horde",
+    "character_name": "bob",
+}
+
+
+@pytest.fixture
+def slow_loads(data_dir, monkeypatch):
+    """Record the games loaded, each load held until ``release`` is set."""
+    loads = []
+    release = threading.Event()
+    get_compiled_game = MMOGameValidator._get_compiled_game
+
+    def load(game_code):
+        if game_code not in MMOGameValidator._COMPILED_GAMES:
+            loads.append(game_code)
+            release.wait(5)
+        return get_compiled_game(game_code)
+
+    monkeypatch.setattr(MMOGameValidator, "_get_compiled_game", load)
+    return loads, release
+
+
+def test_concurrent_calls_share_one_load(slow_loads):
+    loads, release = slow_loads
+
+    async def validate():
+        calls = [anormalize_character(dict(CHARACTER)) for _i in range(20)]
+        calls.append(aget_validation_rules(CHARACTER))
+        calls.append(aformat_character(CHARACTER))
+        tasks = [asyncio.ensure_future(call) for call in calls]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(validate())
+    assert loads == ["WCW"]
+    assert results[0] == MMOGameValidator.normalize_character(dict(CHARACTER))
+    assert results[-1] == MMOGameValidator.format_character(CHARACTER)
+
+
+def test_a_cancelled_caller_leaves_the_load_to_the_others(slow_loads):
+    loads, release = slow_loads
+
+    async def validate():
+        first = asyncio.ensure_future(anormalize_character(dict(CHARACTER)))
+        second = asyncio.ensure_future(anormalize_character(dict(CHARACTER)))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        return await second
+
+    assert asyncio.run(validate())["server"] == "Pagle"
+    assert loads == ["WCW"]
+
+
+def test_unknown_game_code(data_dir):
+    with pytest.raises(InvalidCharacter) as error:
+        asyncio.run(anormalize_character({"game_code": "xx"}))
+    assert error.value.errors == {"game_code": "invalid"}
@@ -0,0 +1,63 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+
+import MMOGameValidator
+from MMOGameValidator import get_validation_rules, reload_changed
+from MMOGameValidator.bundle import GameBundle, build_bundle
+
+
+def _read(data_dir, game_code):
+    path = os.path.join(str(data_dir), "%s.json" % game_code)
+    with io.open(path, encoding="utf-8") as data:
+        return json.load(data)
+
+
+def test_round_trip(data_dir):
+    bundle = GameBundle(build_bundle(str(data_dir)))
+    assert bundle.game_codes() == ["la", "nw", "wcw", "zz"]
+    for game_code in bundle.game_codes():
+        assert dict(bundle.get_database(game_code)) == _read(data_dir, game_code)
+    assert bundle.get_database("xx") is None
+
+
+def test_bundle_is_read_instead_of_the_files(data_dir, bump_mtime):
+    path = build_bundle(str(data_dir))
+    bump_mtime(path, after=os.path.join(str(data_dir), "zz.json"))
+    database = MMOGameValidator._load_database("nw")
+    assert database is MMOGameValidator._BUNDLE_CACHE[path][1].get_database("nw")
+    assert MMOGameValidator._DATABASE_CACHE == {}
+
+
+def test_file_newer_than_the_bundle_is_read(data_dir, rewrite, bump_mtime):
+    path = build_bundle(str(data_dir))
+    bump_mtime(path, after=os.path.join(str(data_dir), "zz.json"))
+    get_validation_rules({"game_code": "nw"})
+
+    def rename(database):
+        database["NW"]["name"] = "New World 2"
+
+    bump_mtime(rewrite("nw", rename), after=path)
+    assert reload_changed() == ["NW"]
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World 2"
+
+
+def test_reload_changed_picks_up_a_rebuilt_bundle(data_dir, rewrite, bump_mtime):
+    path = build_bundle(str(data_dir))
+    bump_mtime(path, after=os.path.join(str(data_dir), "zz.json"))
+    get_validation_rules({"game_code": "nw"})
+    get_validation_rules({"game_code": "wcw"})
+    wcw = MMOGameValidator._COMPILED_GAMES["WCW"]
+
+    def rename(database):
+        database["NW"]["name"] = "New World 2"
+
+    nw_path = rewrite("nw", rename)
+    build_bundle(str(data_dir))
+    bump_mtime(path, after=nw_path)
+    assert reload_changed() == ["NW"]
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World 2"
+    assert MMOGameValidator._COMPILED_GAMES["WCW"] is wcw
+    assert reload_changed() == []
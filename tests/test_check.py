@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+
+import io
+import os
+
+from MMOGameValidator.check import check_data_dir, check_database, errors
+
+DEFAULTS = {
+    "ZZ": {
+        "fmt": "%N%n%A%n%C",
+        "require": "AC",
+        "region_name_type": "region",
+        "locality_name_type": "server",
+        "regex_name_type": "character_name",
+    }
+}
+
+
+def _messages(problems, blocking):
+    return sorted(p.message for p in problems if p.blocking is blocking)
+
+
+def test_bad_game():
+    database = {
+        "XX": {
+            "fmt": "%N%n%O",
+            "sub_keys": "NA~EU~",
+            "sub_names": "North America~Europe",
+            "zip": "[a-z",
+        },
+        "XX/NA": {"id": "data/XX/US", "sub_keys": "One~Two"},
+        "XX/NA/One": {},
+        "XX/EU/Three": {},
+        "XX/": {},
+    }
+    problems = check_database("xx", database, DEFAULTS)
+    assert _messages(problems, True) == [
+        "XX/: the path has an empty last segment",
+        "XX/EU/Three: the parent record 'XX/EU' is missing",
+        "XX/NA: sub_keys lists 'Two' but 'XX/NA/Two' is missing",
+        "XX: sub_keys lists 'EU' but 'XX/EU' is missing",
+    ]
+    assert _messages(problems, False) == [
+        "XX/NA: id 'data/XX/US' does not match the path",
+        "XX: fmt uses %O, not in FIELD_MAPPING",
+        "XX: sub_keys has empty entries in 'NA~EU~'",
+        "XX: sub_names has 2 entries, sub_keys has 3",
+    ]
+    assert errors(problems) == [p for p in problems if p.blocking]
+
+
+def test_bad_regex_is_an_error():
+    database = {"XX": {"sub_keys": "NA"}, "XX/NA": {"regex": "(a"}}
+    problems = check_database("xx", database, DEFAULTS)
+    assert len(errors(problems)) == 1
+    assert errors(problems)[0].message.startswith(
+        "XX/NA: regex '(a' does not compile: "
+    )
+
+
+def test_undecodable_file(data_dir):
+    with io.open(os.path.join(str(data_dir), "xx.json"), "w") as data:
+        data.write("{")
+    problems = errors(check_data_dir(str(data_dir)))
+    assert len(problems) == 1
+    assert problems[0].message.startswith("xx.json: not valid JSON")
+
+
+def test_shipped_data_has_no_errors():
+    from MMOGameValidator import VALIDATION_DATA_DIR
+
+    problems = check_data_dir(VALIDATION_DATA_DIR)
+    assert errors(problems) == []
+    assert str(problems[0]).startswith("warning: ")
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+
+from MMOGameValidator.__main__ import main
+
+VALID = {
+    "game_code": "wcw",
+    "region": "na",
+    "server": "pagle",
+    "faction": "horde",
+    "character_name": "bob",
+}
+
+
+def _run(tmp_path, name, text, *options):
+    input_path = os.path.join(str(tmp_path), name)
+    output_path = os.path.join(str(tmp_path), "output")
+    errors_path = os.path.join(str(tmp_path), "errors.jsonl")
+    with io.open(input_path, "w", encoding="utf-8") as data:
+        data.write(text)
+    argv = [input_path, "-o", output_path, "-e", errors_path] + list(options)
+    assert main(argv) == 0
+    with io.open(output_path, encoding="utf-8") as data:
+        output = data.read()
+    with io.open(errors_path, encoding="utf-8") as data:
+        errors = [json.loads(line) for line in data]
+    return output, errors
+
+
+def test_jsonl(tmp_path):
+    lines = [
+        json.dumps(VALID),
+        "",
+        "not json",
+        json.dumps(dict(VALID, server="nope")),
+        json.dumps(dict(VALID, game_code=None)),
+        json.dumps(dict(VALID, region=1)),
+        json.dumps(dict(VALID, game_code="xx")),
+    ]
+    output, errors = _run(tmp_path, "in.jsonl", "\n".join(lines) + "\n", "--format")
+    [record] = [json.loads(line) for line in output.splitlines()]
+    assert record["server"] == "Pagle"
+    assert record["formatted"]
+    assert [(error["line"], error["errors"]) for error in errors] == [
+        (3, {"input": "invalid"}),
+        (4, {"server": "invalid"}),
+        (5, {"game_code": "required"}),
+        (6, {"region": "invalid"}),
+        (7, {"game_code": "invalid"}),
+    ]
+
+
+def test_csv(tmp_path):
+    text = (
+        "game_code,region,server,faction,character_name\n"
+        "wcw,na,pagle,horde,bob,EXTRA\n"
+        "wcw,na,pagle,horde,bob\n"
+        "wcw,na\n"
+    )
+    output, errors = _run(tmp_path, "in.csv", text)
+    assert output.splitlines() == [
+        "game_code,region,server,faction,character_name,sorting_code",
+        "WCW,NA,Pagle,horde,bob,",
+    ]
+    assert [(error["line"], error["errors"]) for error in errors] == [
+        (2, {"input": "invalid"}),
+        (
+            4,
+            {
+                "server": "required",
+                "faction": "required",
+                "character_name": "required",
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+
+import pytest
+
+from MMOGameValidator import validate_character
+from MMOGameValidator.columnar import normalize_columns
+
+FIELDS = ("game_code", "region", "server", "faction", "character_name")
+
+with io.open(
+    os.path.join(os.path.dirname(__file__), "data", "normalize_character.json"),
+    encoding="utf-8",
+) as cases:
+    CHARACTERS = [case["character"] for case in json.load(cases)]
+
+
+def _columns(characters):
+    return {field: [c.get(field) for c in characters] for field in FIELDS}
+
+
+def test_rows_match_validate_character():
+    characters = CHARACTERS * 2
+    result = normalize_columns(dict(_columns(characters), extra=list(characters)))
+    assert result.columns["extra"] == list(characters)
+    for row, character in enumerate(characters):
+        expected = validate_character(dict(character))
+        assert result.valid[row] is expected.valid
+        for field in FIELDS + ("sorting_code",):
+            assert result.errors[field][row] is (field in expected.errors)
+        if expected.valid:
+            for field, value in expected.cleaned_data.items():
+                assert result.columns[field][row] == value
+
+
+def test_missing_values_and_columns():
+    result = normalize_columns(
+        {
+            "game_code": ["wcw", "wcw", None],
+            "region": ["na", float("nan"), "na"],
+            "server": ["pagle", "pagle", "pagle"],
+            "faction": ["horde", "horde", "horde"],
+            "character_name": ["bob", "bob", "bob"],
+        }
+    )
+    assert result.valid == [True, False, False]
+    assert result.errors["region"] == [False, True, False]
+    assert result.errors["game_code"] == [False, False, True]
+    assert result.columns["sorting_code"] == ["", "", ""]
+
+
+def test_columns_must_have_the_same_length():
+    with pytest.raises(ValueError):
+        normalize_columns({"game_code": ["wcw"], "region": []})
+
+
+def test_numpy_columns():
+    numpy = pytest.importorskip("numpy")
+    columns = {
+        field: numpy.array(values, dtype=object)
+        for field, values in _columns(CHARACTERS).items()
+    }
+    result = normalize_columns(columns)
+    expected = normalize_columns(_columns(CHARACTERS))
+    assert result.valid.tolist() == expected.valid
+    for field in expected.columns:
+        assert list(result.columns[field]) == expected.columns[field]
@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+def _lazy_modules():
+    # the import time budget is left to benchmarks/check_import_time.py,
+    # run by tox -e importtime; only its list of lazy modules is shared
+    path = os.path.join(ROOT, "benchmarks", "check_import_time.py")
+    spec = importlib.util.spec_from_file_location("check_import_time", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.LAZY_MODULES
+
+
+def test_import_loads_no_lazy_module():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, MMOGameValidator; print('\\n'.join(sys.modules))",
+        ],
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stdout.split()
+    assert sorted(set(_lazy_modules()) & set(loaded)) == []
@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+
+import functools
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import MMOGameValidator
+from MMOGameValidator.parallel import ParallelValidator
+
+with io.open(
+    os.path.join(os.path.dirname(__file__), "data", "normalize_character.json"),
+    encoding="utf-8",
+) as cases:
+    CHARACTERS = [case["character"] for case in json.load(cases)] * 3
+
+
+def test_results_match_the_serial_ones():
+    with ParallelValidator(jobs=2, chunk_size=7) as validator:
+        results = list(validator.normalize_characters(iter(CHARACTERS)))
+        valid = [c for c, (cleaned, _errors) in zip(CHARACTERS, results) if cleaned]
+        formatted = list(validator.format_characters(valid))
+        lengths = list(validator.map(len, CHARACTERS))
+    assert results == list(MMOGameValidator.normalize_characters(CHARACTERS))
+    assert formatted == [MMOGameValidator.format_character(c) for c in valid]
+    assert lengths == [len(c) for c in CHARACTERS]
+
+
+@pytest.fixture
+def spawn(monkeypatch):
+    """Start workers that inherit nothing patched, as on macOS and Windows."""
+    monkeypatch.setattr(
+        MMOGameValidator.parallel,
+        "ProcessPoolExecutor",
+        functools.partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")
+        ),
+    )
+
+
+def test_workers_read_the_patched_data(spawn, rewrite):
+    def rename(database):
+        database["NW"]["name"] = "New World 2"
+
+    rewrite("nw", rename)
+    character = {"game_code": "nw", "region": "usw", "server": "el dorado"}
+    with ParallelValidator(jobs=1, game_codes=["nw"]) as validator:
+        [formatted] = validator.format_characters([character])
+    assert formatted.endswith("New World 2")
+
+
+def test_workers_read_the_synced_data(spawn, data_dir, tmp_path, monkeypatch):
+    with io.open(os.path.join(str(data_dir), "nw.json"), encoding="utf-8") as data:
+        database = json.load(data)
+    database["NW"]["name"] = "New World 2"
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "nw.json").write_text(json.dumps(database))
+    monkeypatch.setattr(MMOGameValidator, "VALIDATION_CACHE_DIR", str(cache_dir))
+    character = {"game_code": "nw", "region": "usw", "server": "el dorado"}
+    with ParallelValidator(jobs=1, game_codes=["nw"]) as validator:
+        [formatted] = validator.format_characters([character])
+    assert formatted.endswith("New World 2")
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ParallelValidator(jobs=1, chunk_size=0)
@@ -0,0 +1,73 @@
+from __future__ import unicode_literals
+
+import threading
+
+import MMOGameValidator
+from MMOGameValidator import get_validation_rules, reload_changed
+from MMOGameValidator.watch import DataWatcher
+
+
+def _rename_nw(name):
+    def update(database):
+        database["NW"]["name"] = name
+
+    return update
+
+
+def test_reload_changed_swaps_only_the_changed_game(rewrite):
+    get_validation_rules({"game_code": "nw"})
+    get_validation_rules({"game_code": "wcw"})
+    nw = MMOGameValidator._COMPILED_GAMES["NW"]
+    wcw = MMOGameValidator._COMPILED_GAMES["WCW"]
+    assert reload_changed() == []
+
+    rewrite("nw", _rename_nw("New World 2"))
+    assert reload_changed() == ["NW"]
+    assert MMOGameValidator._COMPILED_GAMES["WCW"] is wcw
+    assert MMOGameValidator._COMPILED_GAMES["NW"] is not nw
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World 2"
+    assert reload_changed() == []
+
+
+def test_reload_changed_keeps_data_that_fails_to_parse(rewrite):
+    get_validation_rules({"game_code": "nw"})
+    nw = MMOGameValidator._COMPILED_GAMES["NW"]
+    rewrite("nw", text="{")
+    assert reload_changed() == []
+    assert MMOGameValidator._COMPILED_GAMES["NW"] is nw
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World"
+    # until the file is fixed
+    rewrite("nw", text='{"NW": {"name": "New World 2"}}')
+    assert reload_changed() == ["NW"]
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World 2"
+
+
+def test_a_defaults_change_recompiles_every_game(rewrite):
+    get_validation_rules({"game_code": "nw"})
+    get_validation_rules({"game_code": "wcw"})
+
+    def update(database):
+        database["ZZ"]["upper"] = "CSN"
+
+    rewrite("zz", update)
+    assert reload_changed() == ["NW", "WCW", "ZZ"]
+
+
+def test_watcher_reloads_and_survives_a_failing_callback(rewrite):
+    get_validation_rules({"game_code": "nw"})
+    reloads = []
+    reloaded = threading.Event()
+
+    def callback(game_codes):
+        reloads.append(game_codes)
+        reloaded.set()
+        raise RuntimeError("a broken callback")
+
+    with DataWatcher(interval=0.01, callback=callback):
+        rewrite("nw", _rename_nw("New World 2"))
+        assert reloaded.wait(5)
+        reloaded.clear()
+        rewrite("nw", _rename_nw("New World 3"))
+        assert reloaded.wait(5)
+    assert reloads == [["NW"], ["NW"]]
+    assert get_validation_rules({"game_code": "nw"}).game_name == "New World 3"
@@ -0,0 +1,59 @@
+from __future__ import unicode_literals
+
+from MMOGameValidator import get_choices, reload_changed
+from MMOGameValidator.servers import (
+    complete_servers,
+    find_servers,
+    get_server_index,
+    is_valid_server,
+)
+
+
+def test_complete():
+    assert complete_servers("wcw", "th") == [("EU", "Thekal")]
+    assert complete_servers("WCW", " T ", region="europe", limit=2) == [
+        ("EU", "Thekal"),
+        ("EU", "Transcendence"),
+    ]
+    assert complete_servers("wcw", "t", region="nowhere") == []
+    everything = complete_servers("wcw", "", limit=None)
+    assert len(everything) == len(get_server_index("wcw"))
+    assert len(everything) == sum(
+        len({name for name, _label in servers})
+        for _region, servers in get_choices("wcw", "server")
+    )
+
+
+def test_complete_with_no_room():
+    assert complete_servers("wcw", "", limit=0) == []
+    assert complete_servers("wcw", "", limit=-1) == []
+    assert len(complete_servers("wcw", "", limit=3)) == 3
+
+
+def test_find():
+    assert find_servers("la", "mri") == (("NAW", "Mari"),)
+    assert find_servers("la", " MRI ") == (("NAW", "Mari"),)
+    assert find_servers("la", "") == ()
+    assert find_servers("la", "nope") == ()
+
+
+def test_is_valid_server():
+    assert is_valid_server("wcw", "europe", "thekal")
+    assert not is_valid_server("wcw", "na", "thekal")
+    # the empty key a trailing "~" leaves in WCW/EU
+    assert not is_valid_server("wcw", "eu", "")
+    assert not is_valid_server("xx", "eu", "thekal")
+    assert ("EU", "Thekal") in get_server_index("wcw")
+
+
+def test_index_follows_reloads(rewrite):
+    def add_server(database):
+        database["NW/USW"]["sub_keys"] += "~Nova"
+
+    index = get_server_index("nw")
+    assert get_server_index("nw") is index
+    assert not is_valid_server("nw", "usw", "nova")
+    rewrite("nw", add_server)
+    assert reload_changed() == ["NW"]
+    assert get_server_index("nw") is not index
+    assert is_valid_server("nw", "usw", "nova")
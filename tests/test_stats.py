@@ -0,0 +1,79 @@
+from __future__ import unicode_literals
+
+import pytest
+
+import MMOGameValidator
+from MMOGameValidator import InvalidCharacter, normalize_character
+
+VALID = {
+    "game_code": "wcw",
+    "region": "na",
+    "server": "pagle",
+    "faction": "horde",
+    "character_name": "bob",
+}
+
+
+@pytest.fixture
+def stats(data_dir):
+    stats = MMOGameValidator.enable_stats()
+    yield stats
+    MMOGameValidator.disable_stats()
+
+
+def test_counters_timings_and_failures(stats):
+    assert MMOGameValidator.get_stats() is stats
+    normalize_character(dict(VALID))
+    normalize_character(dict(VALID))
+    with pytest.raises(InvalidCharacter):
+        normalize_character(dict(VALID, server="nope", character_name=""))
+    snapshot = stats.snapshot()
+    wcw = snapshot["WCW"]
+    assert wcw["counters"] == {
+        "files_loaded": 1,
+        "rules_cache_misses": 2,
+        "rules_cache_hits": 1,
+    }
+    assert snapshot["ZZ"]["counters"] == {"files_loaded": 1}
+    assert wcw["failures"] == {
+        "server": {"invalid": 1},
+        "character_name": {"required": 1},
+    }
+    assert wcw["timings"]["compile_game"]["count"] == 1
+    assert wcw["timings"]["compile_rules"]["count"] == 2
+    for stage in ("match_choices", "match_name"):
+        timing = wcw["timings"][stage]
+        assert timing["count"] == 3
+        assert 0 <= timing["max"] <= timing["total"]
+
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_nothing_is_recorded_once_disabled(stats):
+    MMOGameValidator.disable_stats()
+    normalize_character(dict(VALID))
+    assert MMOGameValidator.get_stats() is None
+    assert stats.snapshot() == {}
+
+
+def test_any_recorder_can_be_installed(data_dir):
+    class Recorder(object):
+        def __init__(self):
+            self.calls = []
+
+        def count(self, game_code, name, value=1):
+            self.calls.append(("count", game_code, name))
+
+        def timing(self, game_code, stage, seconds):
+            self.calls.append(("timing", game_code, stage))
+
+        def failure(self, game_code, field, error):
+            self.calls.append(("failure", game_code, field, error))
+
+    recorder = MMOGameValidator.enable_stats(Recorder())
+    try:
+        list(MMOGameValidator.normalize_characters([{"game_code": "xx"}]))
+    finally:
+        MMOGameValidator.disable_stats()
+    assert ("failure", "XX", "game_code", "invalid") in recorder.calls
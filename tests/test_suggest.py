@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from MMOGameValidator import (
+    InvalidCharacter,
+    get_validation_rules,
+    normalize_character,
+)
+from MMOGameValidator.suggest import get_suggestion_index, suggest
+
+CHOICES = [
+    ("Thekal", "Thekal"),
+    ("Thrall", "Thrall"),
+    ("Earthshaker", "Earthshaker"),
+    ("NA", "Americas"),
+]
+
+
+def test_suggest():
+    assert suggest("thekall", CHOICES) == ["Thekal", "Thrall"]
+    assert suggest("thekall", CHOICES, limit=1) == ["Thekal"]
+    assert suggest(" THRAL ", CHOICES, limit=1) == ["Thrall"]
+    # labels are matched too, the name is suggested
+    assert suggest("america", CHOICES) == ["NA"]
+    assert suggest("zzzzzz", CHOICES) == []
+    assert suggest("", CHOICES) == []
+    assert suggest(None, CHOICES) == []
+
+
+def test_limit_and_cutoff():
+    assert suggest("th", CHOICES, limit=5, cutoff=0.0)[:2] == ["Thekal", "Thrall"]
+    assert len(suggest("th", CHOICES, limit=1, cutoff=0.0)) == 1
+    assert suggest("thekal", CHOICES, cutoff=1.0) == ["Thekal"]
+    assert suggest("thekl", CHOICES, cutoff=1.0) == []
+
+
+def test_index_is_built_once_per_choices():
+    choices = list(CHOICES)
+    assert get_suggestion_index(choices) is get_suggestion_index(choices)
+    assert get_suggestion_index(list(CHOICES)) is not get_suggestion_index(choices)
+
+
+def test_normalize_character_suggestions():
+    character = {
+        "game_code": "wcw",
+        "region": "eu",
+        "server": "thekall",
+        "faction": "hord",
+        "character_name": "bob",
+    }
+    with pytest.raises(InvalidCharacter) as error:
+        normalize_character(dict(character), suggest=2)
+    assert error.value.errors == {"server": "invalid", "faction": "invalid"}
+    assert error.value.suggestions["server"][0] == "Thekal"
+    assert error.value.suggestions["faction"] == ["horde"]
+    rules = get_validation_rules(character)
+    assert set(error.value.suggestions["server"]) <= {
+        name for name, _label in rules.server_choices
+    }
+
+    # none unless asked for, and none without a valid game code
+    with pytest.raises(InvalidCharacter) as error:
+        normalize_character(dict(character))
+    assert error.value.suggestions == {}
+    with pytest.raises(InvalidCharacter) as error:
+        normalize_character({"game_code": "xx", "server": "thekall"}, suggest=3)
+    assert error.value.suggestions == {}
@@ -0,0 +1,125 @@
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import MMOGameValidator
+from MMOGameValidator.sync import META_SUFFIX, DataSync
+
+pytest.importorskip("requests")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # serves origin_dir, answering a matching If-None-Match with a 304
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = os.path.join(self.server.origin_dir, self.path.lstrip("/"))
+        try:
+            with open(path, "rb") as data:
+                content = data.read()
+        except OSError:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            content = b""
+        else:
+            self.server.downloads.append(self.path)
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin(data_dir, tmp_path_factory):
+    """A copy of the shipped data served over HTTP, ``origin.url`` has %s."""
+    origin_dir = str(tmp_path_factory.mktemp("origin"))
+    for game_code in ["zz", "nw"]:
+        shutil.copy(os.path.join(str(data_dir), "%s.json" % game_code), origin_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.origin_dir = origin_dir
+    server.downloads = []
+    server.url = "http://127.0.0.1:%d/%%s.json" % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _rename_nw(origin, name):
+    path = os.path.join(origin.origin_dir, "nw.json")
+    with io.open(path, encoding="utf-8") as data:
+        database = json.load(data)
+    database["NW"]["name"] = name
+    with io.open(path, "w", encoding="utf-8") as data:
+        data.write(json.dumps(database))
+
+
+@pytest.fixture
+def sync(origin, tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    return DataSync(origin.url, cache_dir, game_codes=["zz", "nw"], max_workers=2)
+
+
+def test_sync_fetches_only_what_changed(origin, sync):
+    report = sync.sync()
+    assert (sorted(report["updated"]), report["failed"]) == (["nw", "zz"], {})
+    for game_code in ["zz", "nw"]:
+        assert os.path.exists(os.path.join(sync.cache_dir, "%s.json" % game_code))
+    assert len(origin.downloads) == 2
+
+    report = sync.sync()
+    assert sorted(report["unchanged"]) == ["nw", "zz"]
+    assert len(origin.downloads) == 2
+
+    _rename_nw(origin, "New World 2")
+    report = sync.sync()
+    assert (report["updated"], report["unchanged"]) == (["nw"], ["zz"])
+    assert origin.downloads[2:] == ["/nw.json"]
+
+
+def test_a_lost_cached_file_is_fetched_again(origin, sync):
+    sync.sync()
+    os.remove(os.path.join(sync.cache_dir, "nw.json"))
+    assert sync.sync()["updated"] == ["nw"]
+    assert os.path.exists(os.path.join(sync.cache_dir, "nw.json" + META_SUFFIX))
+
+
+def test_activated_sync_updates_the_rules(origin, sync):
+    sync.sync()
+    sync.activate()
+    assert sync.is_active()
+    character = {"game_code": "nw"}
+    assert MMOGameValidator.get_validation_rules(character).game_name == "New World"
+    _rename_nw(origin, "New World 2")
+    sync.sync()
+    rules = MMOGameValidator.get_validation_rules(character)
+    assert rules.game_name == "New World 2"
+
+
+def test_failed_games_keep_their_cached_copy(origin, sync):
+    sync.sync()
+    with io.open(os.path.join(origin.origin_dir, "nw.json"), "w") as data:
+        data.write('{"WCW": {}}')
+    report = sync.sync(["nw", "xx"])
+    assert sorted(report["failed"]) == ["nw", "xx"]
+    assert "not the data of game" in report["failed"]["nw"]
+    with io.open(os.path.join(sync.cache_dir, "nw.json"), encoding="utf-8") as data:
+        assert "NW" in json.load(data)
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+
+import threading
+
+import MMOGameValidator
+from MMOGameValidator import get_validation_rules, validate_character
+
+
+def _run_threads(count, target):
+    barrier = threading.Barrier(count)
+    failures = []
+
+    def run(position):
+        barrier.wait()
+        try:
+            target(position)
+        except Exception as e:  # reported below, from the main thread
+            failures.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+
+
+def test_cold_start_from_many_threads(data_dir):
+    game_codes = ["LA", "NW", "WCW"]
+    count = 12
+    barrier = threading.Barrier(count)
+    games = [None] * count
+    failures = []
+
+    def load(position):
+        game_code = game_codes[position % len(game_codes)]
+        barrier.wait()
+        try:
+            get_validation_rules({"game_code": game_code})
+        except Exception as e:  # reported below, from the main thread
+            failures.append(e)
+        games[position] = MMOGameValidator._COMPILED_GAMES.get(game_code)
+
+    stats = MMOGameValidator.enable_stats()
+    try:
+        threads = [
+            threading.Thread(target=load, args=(i,)) for i in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        MMOGameValidator.disable_stats()
+    assert failures == []
+    snapshot = stats.snapshot()
+    for position, game_code in enumerate(game_codes):
+        assert snapshot[game_code]["counters"]["files_loaded"] == 1
+        assert snapshot[game_code]["timings"]["compile_game"]["count"] == 1
+        same_game = games[position :: len(game_codes)]
+        assert all(game is games[position] for game in same_game)
+
+
+def test_lru_cache_stays_bounded_under_contention():
+    cache = MMOGameValidator._LRUCache(8)
+
+    def use(position):
+        for i in range(2000):
+            key = (position + i) % 32
+            if cache.get(key) is None:
+                cache.set(key, i)
+            if i % 500 == 0:
+                cache.discard(lambda key: key % 2)
+
+    _run_threads(8, use)
+    assert len(cache._data) <= 8
+
+
+def test_reads_during_reloads(rewrite):
+    names = ["New World", "New World 2", "New World 3"]
+    character = {
+        "game_code": "nw",
+        "region": "usw",
+        "server": "el dorado",
+        "character_name": "bob",
+    }
+    get_validation_rules(character)
+    seen = set()
+    done = threading.Event()
+
+    def read(position):
+        if position == 0:
+            for name in names[1:]:
+                rewrite("nw", lambda database: database["NW"].update(name=name))
+                assert MMOGameValidator.reload_changed() == ["NW"]
+            done.set()
+            return
+        while not done.is_set():
+            result = validate_character(dict(character))
+            assert result.errors == {}
+            seen.add(get_validation_rules(character).game_name)
+
+    _run_threads(4, read)
+    assert seen <= set(names)
+    assert get_validation_rules(character).game_name == names[-1]
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import re
+
+import pytest
+
+import MMOGameValidator
+from MMOGameValidator import (
+    InvalidCharacter,
+    clear_cache,
+    format_character,
+    get_cache_info,
+    get_choices,
+    get_field_order,
+    get_validation_rules,
+    latinize_character,
+    latinize_characters,
+    normalize_character,
+    normalize_characters,
+    validate_character,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# recorded from normalize_character before any caching was added, on the
+# shipped data
+with io.open(
+    os.path.join(HERE, "data", "normalize_character.json"), encoding="utf-8"
+) as cases:
+    BASELINE_CASES = json.load(cases)
+with io.open(
+    os.path.join(HERE, "data", "format_character.json"), encoding="utf-8"
+) as cases:
+    FORMAT_CASES = json.load(cases)
+with io.open(
+    os.path.join(HERE, "data", "latinize_character.json"), encoding="utf-8"
+) as cases:
+    LATIN_CASES = json.load(cases)
+
+
+def _rename_nw(name):
+    def update(database):
+        database["NW"]["name"] = name
+
+    return update
+
+
+def test_database_is_parsed_once(data_dir):
+    stats = MMOGameValidator.enable_stats()
+    try:
+        database = MMOGameValidator._load_database("nw")
+        assert MMOGameValidator._load_database("nw") is database
+    finally:
+        MMOGameValidator.disable_stats()
+    assert stats.snapshot()["NW"]["counters"]["files_loaded"] == 1
+
+
+def test_rules_cache_hit_and_miss(data_dir):
+    character = {"game_code": "nw", "region": "usw"}
+    rules = get_validation_rules(character)
+    assert get_cache_info()["misses"] == 1
+    assert get_validation_rules(dict(character)) is rules
+    assert get_cache_info()["hits"] == 1
+    other = get_validation_rules({"game_code": "nw", "region": "use"})
+    assert other is not rules
+    assert get_cache_info()["misses"] == 2
+
+
+def test_modified_file_is_reparsed(rewrite):
+    database = MMOGameValidator._load_database("nw")
+    rewrite("nw", _rename_nw("New World 2"))
+    reloaded = MMOGameValidator._load_database("nw")
+    assert reloaded is not database
+    assert reloaded["NW"]["name"] == "New World 2"
+
+
+def test_clear_cache(data_dir):
+    get_validation_rules({"game_code": "nw"})
+    database = MMOGameValidator._load_database("nw")
+    info = get_cache_info()
+    assert info["games"] and info["databases"] and info["size"]
+    clear_cache()
+    info = get_cache_info()
+    assert (info["games"], info["databases"], info["size"]) == (0, 0, 0)
+    assert MMOGameValidator._load_database("nw") is not database
+
+
+EL_DORADO = {
+    "game_code": "nw",
+    "region": "usw",
+    "server": "el dorado",
+    "character_name": "bob",
+}
+
+
+@pytest.fixture
+def result_cache(data_dir):
+    """Enable the result cache and return a function reading its counters."""
+
+    def enable(ttl=None):
+        MMOGameValidator.enable_result_cache(ttl=ttl)
+        return lambda: get_cache_info()["results"]
+
+    yield enable
+    MMOGameValidator.disable_result_cache()
+
+
+def test_result_cache_hit(result_cache):
+    results = result_cache()
+    cleaned_data = validate_character(EL_DORADO).cleaned_data
+    assert validate_character(dict(EL_DORADO)).cleaned_data == cleaned_data
+    assert normalize_character(dict(EL_DORADO)) == cleaned_data
+    assert (results()["hits"], results()["misses"]) == (2, 1)
+    # callers get a character of their own
+    validate_character(EL_DORADO).cleaned_data["server"] = "Yggdrasil"
+    assert normalize_character(EL_DORADO)["server"] == "El Dorado"
+
+
+def test_result_cache_keeps_errors(result_cache):
+    results = result_cache()
+    character = dict(EL_DORADO, server="atlantis")
+    assert validate_character(character).errors == {"server": "invalid"}
+    with pytest.raises(InvalidCharacter) as excinfo:
+        normalize_character(character)
+    assert excinfo.value.errors == {"server": "invalid"}
+    assert results()["hits"] == 1
+
+
+def test_result_cache_is_invalidated_on_reload(result_cache, rewrite):
+    results = result_cache()
+    assert validate_character(EL_DORADO).errors == {}
+
+    def drop_el_dorado(database):
+        database["NW/USW"]["sub_keys"] = "Yggdrasil"
+
+    rewrite("nw", drop_el_dorado)
+    assert MMOGameValidator.reload_changed() == ["NW"]
+    assert validate_character(EL_DORADO).errors == {"server": "invalid"}
+    assert (results()["hits"], results()["misses"]) == (0, 2)
+
+
+def test_result_cache_ttl(result_cache):
+    results = result_cache(ttl=0)
+    validate_character(EL_DORADO)
+    validate_character(EL_DORADO)
+    assert (results()["hits"], results()["misses"]) == (0, 2)
+
+
+def test_disabled_result_cache(result_cache):
+    result_cache()
+    MMOGameValidator.disable_result_cache()
+    validate_character(EL_DORADO)
+    assert "results" not in get_cache_info()
+
+
+def _assert_index_matches_like_the_linear_scan(choices):
+    index = MMOGameValidator._make_choice_index(choices)
+    texts = {text for choice in choices for text in choice}
+    for text in texts | {"", "nope", None}:
+        for value in {text, text and text.upper(), text and " %s " % text}:
+            expected = MMOGameValidator._match_choices(value, choices)
+            assert MMOGameValidator._match_index(value, index) == expected
+
+
+@pytest.mark.parametrize("game_code", ["la", "nw", "wcw"])
+def test_choice_index_matches_like_the_linear_scan(game_code):
+    for record in MMOGameValidator._load_database(game_code).values():
+        choices = MMOGameValidator._make_choices(record)
+        choices += MMOGameValidator._make_none_choices(record)
+        _assert_index_matches_like_the_linear_scan(choices)
+
+
+def test_choice_index_keeps_the_first_match():
+    # a label spelled like another name, and names differing by case
+    _assert_index_matches_like_the_linear_scan(
+        [("A", "B"), ("B", "A"), ("b", "c"), (" C ", "D")]
+    )
+
+
+@pytest.mark.parametrize("case", BASELINE_CASES)
+def test_normalize_character_matches_baseline(case):
+    character = case["character"]
+    if "errors" in case:
+        with pytest.raises(InvalidCharacter) as error:
+            normalize_character(dict(character))
+        assert error.value.errors == case["errors"]
+    else:
+        assert normalize_character(dict(character)) == case["cleaned"]
+
+
+@pytest.mark.parametrize("case", BASELINE_CASES)
+def test_validate_character_matches_baseline(case):
+    character = dict(case["character"])
+    result = validate_character(character)
+    assert character == case["character"]
+    assert result.cleaned_data == case.get("cleaned")
+    assert dict(result.errors) == case.get("errors", {})
+    assert result.valid is bool(result) is ("cleaned" in case)
+
+
+def test_validate_character_errors_are_read_only():
+    result = validate_character(BASELINE_CASES[0]["character"])
+    assert result.valid
+    with pytest.raises(TypeError):
+        result.errors["game_code"] = "invalid"
+
+
+@pytest.mark.parametrize("case", FORMAT_CASES)
+def test_format_character_matches_baseline(case):
+    character = case["character"]
+    latin = case["latin"]
+    assert format_character(dict(character), latin=latin) == case["formatted"]
+    assert get_field_order(dict(character), latin=latin) == case["field_order"]
+
+
+def test_format_templates_are_shared():
+    character = FORMAT_CASES[0]["character"]
+    format_character(character)
+    rules = get_validation_rules(character)
+    template = MMOGameValidator._get_format_template(rules.character_format)
+    format_character(character)
+    assert MMOGameValidator._get_format_template(rules.character_format) is template
+    # field orders are handed out as fresh lists
+    get_field_order(character)[0].append("region")
+    assert get_field_order(character) == FORMAT_CASES[0]["field_order"]
+
+
+def test_normalize_characters_keeps_input_order():
+    characters = [dict(case["character"]) for case in BASELINE_CASES]
+    results = list(normalize_characters(iter(characters)))
+    assert len(results) == len(BASELINE_CASES)
+    for (cleaned_data, errors), case in zip(results, BASELINE_CASES):
+        assert cleaned_data == case.get("cleaned")
+        assert errors == case.get("errors", {})
+
+
+def test_normalize_characters_reports_bad_records_and_carries_on(rewrite):
+    def drop_region(database):
+        del database["NW/USE"]
+
+    rewrite("nw", drop_region)
+    characters = [
+        {"game_code": None},
+        {"game_code": 5, "region": "usw"},
+        {"game_code": "nw", "region": ["usw"]},
+        {
+            "game_code": "wcw",
+            "region": "na",
+            "server": "pagle",
+            "faction": 1,
+            "character_name": "bob",
+        },
+        {"game_code": "xx"},
+        {"game_code": "nw", "region": "use", "server": "x", "character_name": "ab"},
+        {"game_code": "nw", "region": "usw", "server": "el dorado"},
+    ]
+    assert list(normalize_characters(characters)) == [
+        (None, {"game_code": "invalid"}),
+        (None, {"game_code": "invalid"}),
+        (None, {"region": "invalid"}),
+        (None, {"faction": "invalid"}),
+        (None, {"game_code": "invalid"}),
+        (None, {"game_code": "data_error"}),
+        (None, {"character_name": "required"}),
+    ]
+
+
+def test_get_choices_are_cached_per_matched_region():
+    servers = get_choices("wcw", "server", "eu")
+    assert get_choices("WCW", "server", " Europe ") is servers
+    assert ("Thekal", "Thekal") in servers
+    assert get_choices("wcw", "server", "nowhere") == ()
+    game = MMOGameValidator._COMPILED_GAMES["WCW"]
+    cached = len(game._choices)
+    for i in range(100):
+        get_choices("wcw", "server", "nowhere %d" % i, language="xx%d" % i)
+    assert len(game._choices) == cached
+
+
+def test_get_choices_leave_out_empty_names():
+    for region, servers in get_choices("wcw", "server"):
+        assert region and all(name for name, _label in servers)
+    assert all(name for name, _label in get_choices("la", "region"))
+    assert all(name for name, _label in get_choices("wcw", "server", "eu", "en"))
+
+
+def test_get_choices_in_a_language():
+    assert get_choices("wcw", "region", language="en") == (
+        ("NA", "Americas"),
+        ("EU", "Europe"),
+        ("OC", "Oceania"),
+    )
+    # a language the game lacks falls back to its default one
+    assert get_choices("wcw", "region", language="xx") is get_choices(
+        "wcw", "region", language="en"
+    )
+    with pytest.raises(ValueError):
+        get_choices("wcw", "realm")
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    [
+        [r"^[a-z]{2,12}$", r"^(?!admin)", r"^\w+$"],
+        # backreferences cannot be combined, each regex is matched in turn
+        [r"^(.)(?!\1)", r"^[a-z]+$"],
+        [r"^[a-z]+$"],
+        [],
+    ],
+)
+def test_name_check_rejects_like_sequential_matching(patterns):
+    matchers = [re.compile(pattern) for pattern in patterns]
+    check = MMOGameValidator._NameCheck(matchers)
+    names = ["bob", "Bob", "admin", "a", "aab", "abcdefghijklm", "b0b", ""]
+    for name in names * 2:
+        expected = next((m.pattern for m in matchers if not m.match(name)), None)
+        assert check.rejected_level(name) == expected
+
+
+def test_character_names_are_checked_against_every_level(rewrite):
+    def add_regexes(database):
+        database["LA/NAW"]["regex"] = "[a-z]{2,12}$"
+        database["LA/NAW/Mari"]["regex"] = "(?!admin)"
+
+    rewrite("la", add_regexes)
+    character = {
+        "game_code": "la",
+        "region": "naw",
+        "server": "mari",
+        "faction": "any",
+    }
+    assert validate_character(dict(character, character_name="bob")).valid
+    for name in ("b", "bob1", "abcdefghijklm", "admin"):
+        result = validate_character(dict(character, character_name=name))
+        assert dict(result.errors) == {"character_name": "invalid"}
+    # only the region's regex applies elsewhere in it
+    other = dict(character, server="akkan", character_name="admin")
+    assert validate_character(other).valid
+
+
+def test_latinize_characters_matches_baseline():
+    characters = [dict(case["character"], server_area="") for case in LATIN_CASES]
+    expected = [(case["latinized"], {}) for case in LATIN_CASES]
+    assert list(latinize_characters(characters)) == expected
+    for character, case in zip(characters, LATIN_CASES):
+        assert latinize_character(dict(character)) == case["latinized"]
+    normalized = [normalize_character(dict(c)) for c in characters]
+    assert list(latinize_characters(normalized, normalized=True)) == expected
+
+
+def test_latinize_characters_passes_errors_through():
+    characters = [
+        {"game_code": "xx"},
+        dict(LATIN_CASES[0]["character"], server_area=""),
+        {"game_code": "wcw", "region": "nowhere"},
+    ]
+    results = list(latinize_characters(characters))
+    assert results[0] == (None, {"game_code": "invalid"})
+    assert results[1] == (LATIN_CASES[0]["latinized"], {})
+    assert results[2][0] is None and results[2][1]["region"] == "invalid"
+
+
+def test_preload_compiles_every_level(data_dir):
+    report = MMOGameValidator.preload(["nw", "wcw", "xx"])
+    assert report["games"] == ["nw", "wcw"]
+    assert sorted(report["failed"]) == ["xx"]
+    assert report["memory"] > 0 and report["seconds"] >= 0
+    for game_code in ("NW", "WCW"):
+        game = MMOGameValidator._COMPILED_GAMES[game_code]
+        paths = [path for path in game.database if path.startswith(game_code + "/")]
+        assert set(paths) <= set(game._levels)
+    # nothing is left to load or compile for a request
+    stats = MMOGameValidator.enable_stats()
+    try:
+        normalize_character({"game_code": "nw", "region": "usw", "server": "mari"})
+    except InvalidCharacter:
+        pass
+    finally:
+        MMOGameValidator.disable_stats()
+    timings = stats.snapshot()["NW"]["timings"]
+    assert "load" not in timings and "compile_game" not in timings
+
+
+def test_preload_all_games(data_dir):
+    report = MMOGameValidator.preload(trace_memory=False)
+    assert report["games"] == ["la", "nw", "wcw"]
+    assert report["failed"] == {} and "memory" not in report